@@ -0,0 +1,94 @@
+# Throughput and latency of the contest API client against the local mock server.
+# Usage: python benchmarks/bench_api.py [--records 1000 10000 100000] [--calls 500] [--concurrency 8]
+#        [--latency-ms 0] [--error-rate 0] [--rate-limit-rate 0]
+# "login" is the two-step passport/oauth2 exchange (forced, no cache); "ready_player_list" and
+# "create_game_plan" are single calls through the shared pooled client; "export" is a full
+# export_results_csv run (fetch + CSV write) for each record volume.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+from mock_contest_api import MockContestServer
+
+
+def summarize(name, results, elapsed):
+    ms = np.array([latency for latency, _ in results]) * 1000
+    failed = sum(1 for _, ok in results if not ok)
+    print(f"{name:>20}: {len(ms) / elapsed:8.1f} calls/s  p50 {np.percentile(ms, 50):7.2f}ms  "
+          f"p99 {np.percentile(ms, 99):7.2f}ms  ({len(ms)} calls, {failed} failed after retries)")
+
+
+def timed_calls(call, count, concurrency):
+    # [(latency, succeeded)] per call, and the wall time for all of them
+    def one(_):
+        start = time.perf_counter()
+        try:
+            call()
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(count)))
+    return results, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the contest API client against the local mock server")
+    parser.add_argument("--records", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = MockContestServer(latency_ms=args.latency_ms, error_rate=args.error_rate,
+                               rate_limit_rate=args.rate_limit_rate).start()
+    # Must be set before the client modules read their configuration
+    os.environ.update(server.env())
+    os.environ["MJS_HTTP_RETRIES"] = "5"
+
+    from utils.api import get_client, mjs_get, mjs_post
+    from utils.auth import get_auth_token
+    import export_results_csv
+
+    print(f"Mock server {server.base_url}, latency {args.latency_ms}ms, "
+          f"errors {args.error_rate:.1%}, 429s {args.rate_limit_rate:.1%}, concurrency {args.concurrency}")
+
+    results, elapsed = timed_calls(lambda: get_auth_token(force_refresh=True), 20, 1)
+    summarize("login", results, elapsed)
+
+    get_client().token  # log in once so the calls below only measure the API
+    results, elapsed = timed_calls(lambda: mjs_get("/ready_player_list").raise_for_status(), args.calls, args.concurrency)
+    summarize("ready_player_list", results, elapsed)
+
+    results, elapsed = timed_calls(lambda: mjs_post("/create_game_plan", payload={"account_list": []}).raise_for_status(), args.calls, args.concurrency)
+    summarize("create_game_plan", results, elapsed)
+
+    with tempfile.TemporaryDirectory() as out:
+        os.environ["CSV_OUTPUT_DIR"] = out
+        for count in args.records:
+            server.state.records = count
+            start = time.perf_counter()
+            export_results_csv.export_results_csv(full=True)
+            elapsed = time.perf_counter() - start
+            print(f"{'export ' + str(count):>20}: {elapsed:8.2f}s  ({count / elapsed:,.0f} records/s)")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# Per-round timing of the partition DP used by league_scheduling.add_round.
+# Usage: python benchmarks/bench_round_dp.py [--sizes 8 12 16 20] [--repeat 5] [--legacy] [--bnb] [--cache-dir DIR]
+# "tables" is the one-off structural build per player count (or .npz load with --cache-dir);
+# "numpy" is the per-round cost once tables are warm. --bnb also times the branch-and-bound
+# backend (scheduling.round_search) and checks it reaches the DP's cost; sizes above
+# DP_MAX_SEATS (e.g. --sizes 24 32 40 --bnb) only run branch and bound.
+
+import argparse
+import os
+import random
+import sys
+import time
+from itertools import combinations
+from math import inf
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from scheduling.round_dp import best_partition, clear_cache, dp_tables
+from scheduling.round_search import DP_MAX_SEATS, bnb_partition, group_cost
+
+
+def legacy_partition(cost):
+    # The original pure-Python mask DP, kept for comparison.
+    n = len(cost)
+    quad_cost_map = {}
+    for quad in combinations(range(n), 4):
+        quad_cost_map[quad] = sum(cost[a][b] for a, b in combinations(quad, 2))
+
+    full_mask = (1 << n) - 1
+    dp = [inf] * (1 << n)
+    parent = [None] * (1 << n)
+    dp[0] = 0
+
+    for mask in range(1 << n):
+        if dp[mask] == inf:
+            continue
+        try:
+            i = next(k for k in range(n) if not (mask >> k) & 1)
+        except StopIteration:
+            continue
+        rest = [j for j in range(i + 1, n) if not (mask >> j) & 1]
+        for a, b, c in combinations(rest, 3):
+            quad = (i, a, b, c)
+            new_mask = mask | (1 << i) | (1 << a) | (1 << b) | (1 << c)
+            value = dp[mask] + quad_cost_map[quad]
+            if value < dp[new_mask]:
+                dp[new_mask] = value
+                parent[new_mask] = (mask, quad)
+
+    grouping = []
+    cur = full_mask
+    while cur and parent[cur] is not None:
+        prev, quad = parent[cur]
+        grouping.append(quad)
+        cur = prev
+    return list(reversed(grouping))
+
+
+def random_costs(n, rng):
+    # Pair counts like those seen mid-season: small non-negative integers.
+    upper = np.triu(rng.integers(0, 6, size=(n, n)), 1)
+    return upper + upper.T
+
+
+def time_call(fn, arg, repeat):
+    best = inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the add_round partition DP")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[8, 12, 16, 20])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--legacy", action="store_true", help="Also time the original pure-Python DP (slow at n=20)")
+    parser.add_argument("--bnb", action="store_true", help="Also time the branch-and-bound backend")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-dir", default=None, help="Load/save the per-n DP tables as .npz here")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    random.seed(args.seed)
+
+    print(f"{'n':>3} {'tables (s)':>11} {'numpy (s)':>10} {'legacy (s)':>11} {'speedup':>8} {'bnb (s)':>9}")
+    for n in args.sizes:
+        cost = random_costs(n, rng)
+        table_time = fast = slow = grouping = None
+
+        if n <= DP_MAX_SEATS:
+            clear_cache()
+            start = time.perf_counter()
+            dp_tables(n, args.cache_dir)
+            table_time = time.perf_counter() - start
+
+            fast, grouping = time_call(best_partition, cost, args.repeat)
+
+        if args.legacy and grouping is not None:
+            slow, legacy_grouping = time_call(legacy_partition, cost.tolist(), 1)
+            if legacy_grouping != grouping:
+                print(f"  n={n}: groupings differ!")
+
+        bnb = None
+        if args.bnb:
+            bnb, bnb_grouping = time_call(bnb_partition, cost, 1)
+            if grouping is not None and (sum(group_cost(cost, g) for g in bnb_grouping)
+                                         != sum(group_cost(cost, g) for g in grouping)):
+                print(f"  n={n}: branch and bound missed the optimum (node limit)")
+
+        def cell(value, width, digits=4):
+            return f"{value:>{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+
+        speedup = f"{slow / fast:>7.1f}x" if slow is not None else f"{'-':>8}"
+        print(f"{n:>3} {cell(table_time, 11)} {cell(fast, 10)} {cell(slow, 11)} {speedup} {cell(bnb, 9)}")
+
+
+if __name__ == "__main__":
+    main()
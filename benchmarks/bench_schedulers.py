@@ -0,0 +1,151 @@
+# Speed and quality regression check for both schedulers.
+# Usage: python benchmarks/bench_schedulers.py [--repeat 3] [--quick] [--no-time] [--update]
+#        [--baseline benchmarks/scheduler_baseline.json] [--quality-tol 0.02] [--time-tol 0.5] [--memory-tol 0.25]
+# Every case of the grid (scheduler, players, weeks, rounds/games per week, seed) is run once under
+# tracemalloc for peak memory (cold DP tables), then --repeat times for the best wall time (warm).
+# Quality is the analyze metrics of the schedule (matchup std/min/max, seat std/min/max,
+# back-to-back games).
+#
+# Results are compared with the committed baseline; the script exits with status 1 if any case
+# got worse by more than the tolerances (relative; timings also get a few ms of slack). Seeds
+# are fixed, so quality changes mean the scheduler now picks different games. --update rewrites
+# the baseline after an intended change. --no-time skips the time comparison (other machines).
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from league_scheduling import Scheduler
+from schedule_11_players import WeekScheduler
+from scheduling.analysis import analyze_games
+from scheduling.round_dp import clear_cache
+
+BASELINE = os.path.join(HERE, "scheduler_baseline.json")
+
+# (scheduler, players, weeks, rounds per week / games per week, seed)
+GRID = [
+    *(("league", n, 6, 11, seed) for n in (11, 12, 16, 20) for seed in (1, 2, 3)),
+    *(("week", n, 6, 11, seed) for n in (11, 16) for seed in (1, 2, 3)),
+]
+QUICK_GRID = [("league", 11, 6, 11, 1), ("league", 16, 6, 11, 1), ("week", 11, 6, 11, 1)]
+
+# Lower is better for these; higher is better for the *_min ones
+LOWER_IS_BETTER = ["matchup_std", "matchup_max", "seat_std", "seat_max", "back_to_back"]
+HIGHER_IS_BETTER = ["matchup_min", "seat_min"]
+
+# Absolute slack on wall time, so millisecond cases don't fail on noise
+TIME_SLACK = 0.005
+
+
+def case_name(case):
+    kind, players, weeks, per_week, seed = case
+    return f"{kind} players={players} weeks={weeks} per_week={per_week} seed={seed}"
+
+
+def build(case):
+    # (schedule, weeks) from a fresh scheduler for the case
+    kind, players, weeks, per_week, seed = case
+    if kind == "league":
+        scheduler = Scheduler(num_players=players, weeks=weeks, rounds_per_week=per_week, seed=seed)
+        schedule = scheduler.create_schedule()
+        return schedule, scheduler.schedule_weeks(schedule)
+    return WeekScheduler(num_players=players, games_per_week=per_week, weeks=weeks, seed=seed).create_schedule()
+
+
+def quality(case, schedule, weeks):
+    games, rounds, game_weeks = [], [], []
+    for r_idx, round_games in enumerate(schedule):
+        for game in round_games:
+            games.append(game)
+            rounds.append(r_idx)
+            game_weeks.append(weeks[r_idx])
+    report = analyze_games(games, rounds, game_weeks, case[1])
+    return {**report["metrics"], "back_to_back": report["rest"]["back_to_back"]}
+
+
+def run_case(case, repeat):
+    # The traced run builds the DP tables from scratch, so peak memory does not depend on case order
+    clear_cache()
+    tracemalloc.start()
+    schedule, weeks = build(case)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build(case)
+        best = min(best, time.perf_counter() - start)
+
+    return {"seconds": best, "peak_bytes": peak, **quality(case, schedule, weeks)}
+
+
+def regressions(result, base, args):
+    # Human-readable lines for every metric that got worse beyond tolerance
+    found = []
+    for key in LOWER_IS_BETTER:
+        if result[key] > base[key] * (1 + args.quality_tol) + 1e-9:
+            found.append(f"{key} {base[key]:.4g} -> {result[key]:.4g}")
+    for key in HIGHER_IS_BETTER:
+        if result[key] < base[key] * (1 - args.quality_tol) - 1e-9:
+            found.append(f"{key} {base[key]:.4g} -> {result[key]:.4g}")
+    if not args.no_time and result["seconds"] > base["seconds"] * (1 + args.time_tol) + TIME_SLACK:
+        found.append(f"time {base['seconds'] * 1000:.1f}ms -> {result['seconds'] * 1000:.1f}ms")
+    if result["peak_bytes"] > base["peak_bytes"] * (1 + args.memory_tol):
+        found.append(f"peak memory {base['peak_bytes'] / 1e6:.2f}MB -> {result['peak_bytes'] / 1e6:.2f}MB")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scheduler speed and quality regression check")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best is kept)")
+    parser.add_argument("--quick", action="store_true", help="Only a few small cases")
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--no-time", action="store_true", help="Do not fail on wall time (e.g. on another machine)")
+    parser.add_argument("--quality-tol", type=float, default=0.02, help="Allowed relative worsening of quality metrics")
+    parser.add_argument("--time-tol", type=float, default=0.5, help="Allowed relative slowdown")
+    parser.add_argument("--memory-tol", type=float, default=0.25, help="Allowed relative peak memory growth")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results, failed = {}, 0
+    print(f"{'case':<50} {'time (ms)':>10} {'peak (MB)':>10} {'matchup std':>12} {'seat std':>9} {'b2b':>5}")
+    for case in (QUICK_GRID if args.quick else GRID):
+        name = case_name(case)
+        result = results[name] = run_case(case, args.repeat)
+        print(f"{name:<50} {result['seconds'] * 1000:>10.1f} {result['peak_bytes'] / 1e6:>10.2f} "
+              f"{result['matchup_std']:>12.4f} {result['seat_std']:>9.4f} {result['back_to_back']:>5}")
+
+        if not args.update and name in baseline:
+            for line in regressions(result, baseline[name], args):
+                print(f"  REGRESSION: {line}")
+                failed += 1
+        elif not args.update:
+            print("  (no baseline for this case)")
+
+    if args.update:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    print(f"{failed} regressions" if failed else "No regressions.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+# Local stand-in for the Mahjong Soul passport and contest gate endpoints this repo calls:
+#   POST /user/login                                    -> accessToken
+#   POST /api/contest_gate/api/login?method=oauth2       -> contest token
+#   GET  /api/contest_gate/api/contest/ready_player_list -> waiting room
+#   POST /api/contest_gate/api/contest/create_game_plan  -> removes the players from the room
+#   GET  /api/contest_gate/api/contest/fetch_contest_game_records?offset=&limit= -> one page
+#
+# Usage: python benchmarks/mock_contest_api.py [--port 8900] [--records 10000] [--latency-ms 20]
+#        [--jitter-ms 5] [--error-rate 0.01] [--rate-limit-rate 0.01] [--newest-first]
+# It prints the environment variables that point the scripts at it. Records are generated
+# from their index, so any volume costs nothing until a page is requested.
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+CONTEST_PREFIX = "/api/contest_gate/api/contest"
+OAUTH_PATH = "/api/contest_gate/api/login"
+LOGIN_PATH = "/user/login"
+TOKEN = "mock-token"
+
+
+def roster_nicknames():
+    # Team players from teams.csv when it is around, so match_helpers resolves real teams
+    try:
+        from read_csv import get_teams
+        teams, _ = get_teams()
+        return [p for roster in teams.values() for p in roster]
+    except FileNotFoundError:
+        return [f"player{i}" for i in range(40)]
+
+
+class MockContestState:
+    def __init__(self, records=1000, players=None, newest_first=False, seed=0):
+        self.records = records
+        self.players = players or roster_nicknames()
+        self.newest_first = newest_first
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.room = [{"nickname": n, "account_id": 100000 + i} for i, n in enumerate(self.players)]
+        self.plans = []
+
+    def record(self, i):
+        rng = random.Random(self.seed * 1000003 + i)
+        seats = rng.sample(range(len(self.players)), 4)
+        scores = sorted((rng.randrange(-200, 800) * 100 for _ in range(3)), reverse=True)
+        scores.append(100000 - sum(scores))
+        rng.shuffle(scores)
+        start = 1700000000 + i * 600
+        return {
+            "uuid": f"mock-{self.seed}-{i}",
+            "start_time": start,
+            "end_time": start + 1800 + rng.randrange(1200),
+            "tag": "",
+            "accounts": [{"seat": s, "nickname": self.players[p], "account_id": 100000 + p} for s, p in enumerate(seats)],
+            "result": {"players": [{"seat": s, "part_point_1": pts, "total_point": pts - 25000} for s, pts in enumerate(scores)]},
+        }
+
+    def page(self, offset, limit):
+        end = min(self.records, offset + limit)
+        indexes = range(offset, end)
+        if self.newest_first:
+            indexes = [self.records - 1 - i for i in indexes]
+        return {"total": self.records, "record_list": [self.record(i) for i in indexes]}
+
+    def create_game_plan(self, payload):
+        players = set(payload.get("account_list", []))
+        with self.lock:
+            self.room = [p for p in self.room if p["account_id"] not in players]
+            self.plans.append(payload)
+            return {"game_plan_id": len(self.plans)}
+
+    def waiting(self):
+        with self.lock:
+            return list(self.room)
+
+
+class MockContestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real endpoints, so client connection pooling is exercised.
+    # Headers and body go out as separate writes, so Nagle would add ~40ms per response.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, headers=()):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _simulate(self):
+        # Latency, then maybe a failure. Returns True if a failure was sent.
+        config = self.server.config
+        delay = config["latency_ms"] + random.uniform(-config["jitter_ms"], config["jitter_ms"])
+        if delay > 0:
+            time.sleep(delay / 1000)
+        roll = random.random()
+        if roll < config["rate_limit_rate"]:
+            self._reply(429, {"error": "rate limited"}, [("Retry-After", "0")])
+            return True
+        if roll < config["rate_limit_rate"] + config["error_rate"]:
+            self._reply(500, {"error": "mock failure"})
+            return True
+        return False
+
+    def _authorized(self):
+        if self.headers.get("authorization") != f"Majsoul {TOKEN}":
+            self._reply(401, {"error": "bad token"})
+            return False
+        return True
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if self._simulate() or not self._authorized():
+            return
+        state = self.server.state
+        if url.path == f"{CONTEST_PREFIX}/ready_player_list":
+            self._reply(200, {"data": state.waiting()})
+        elif url.path == f"{CONTEST_PREFIX}/fetch_contest_game_records":
+            query = parse_qs(url.query)
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", ["10"])[0])
+            self._reply(200, {"data": state.page(offset, limit)})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self._body()
+        if self._simulate():
+            return
+        if url.path == LOGIN_PATH:
+            self._reply(200, {"accessToken": "mock-access-token"})
+        elif url.path == OAUTH_PATH:
+            self._reply(200, {"data": {"token": TOKEN}})
+        elif url.path == f"{CONTEST_PREFIX}/create_game_plan":
+            if self._authorized():
+                self._reply(200, {"data": self.server.state.create_game_plan(body)})
+        else:
+            self._reply(404, {"error": "not found"})
+
+
+class MockContestServer:
+    def __init__(self, port=0, records=1000, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, newest_first=False, players=None, seed=0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), MockContestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = {
+            "latency_ms": latency_ms, "jitter_ms": jitter_ms,
+            "error_rate": error_rate, "rate_limit_rate": rate_limit_rate,
+        }
+        self.httpd.state = MockContestState(records, players, newest_first, seed)
+        self.thread = None
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        # Environment that points utils.auth / utils.api at this server
+        return {
+            "MJS_LOGIN_URL": f"{self.base_url}{LOGIN_PATH}",
+            "MJS_OAUTH_URL": f"{self.base_url}{OAUTH_PATH}?method=oauth2",
+            "MJS_API_ROOT": f"{self.base_url}{CONTEST_PREFIX}",
+            "MJS_UID": "1",
+            "MJS_SECRET": "mock-secret",
+        }
+
+    def start(self):
+        # Serve from a background thread (for use inside a benchmark process)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local mock of the Mahjong Soul contest API")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--records", type=int, default=1000, help="Game records reported by the records endpoint")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--newest-first", action="store_true", help="List records newest first")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = MockContestServer(args.port, args.records, args.latency_ms, args.jitter_ms, args.error_rate,
+                               args.rate_limit_rate, args.newest_first, seed=args.seed)
+    print(f"Mock contest API on {server.base_url}")
+    for key, value in server.env().items():
+        print(f"export {key}={value}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 import discord
 from discord.ext import commands
 from read_csv import get_teams, get_schedule, get_individuals
+from role_sync import sync_roles
 # Load environment variables from .env
 load_dotenv()
 
@@ -32,32 +33,17 @@ async def on_ready():
     guild = bot.get_guild(1153518265742667869)
     print(guild)
 
-    for team in teams:
-        players = teams[team]
-        role = discord.utils.get(guild.roles, name=team)
-        if not role:
-            print("Role doesn't exist", team)
-
-        
-        for player in players:
-            discord_name = maj_to_disc_lookup.get(player)
-            if not discord_name:
-                print("Discord name not found for player", player)
-                continue
-
-            member = discord.utils.get(guild.members, name=discord_name)
-            if not member:
-                print("Member doesn't exist", discord_name)
-            elif role not in member.roles:
-                await member.add_roles(role)
-                print(f"Added role {role} to {member}")
-            else:
-                print(f"{member} already has role {role}")
-
-
-
-
-    
+    if guild is None:
+        print("Guild not found.")
+        return
+
+    # ROLE_SYNC_DRY_RUN=1 only reports; ROLE_SYNC_PRUNE=1 also removes team roles from non-members
+    report = await sync_roles(
+        guild, teams, maj_to_disc_lookup,
+        prune=os.getenv('ROLE_SYNC_PRUNE', '').lower() in ('1', 'true', 'yes'),
+        dry_run=os.getenv('ROLE_SYNC_DRY_RUN', '').lower() in ('1', 'true', 'yes'),
+    )
+    print(report)
 
 token = os.getenv('DISCORD_BOT_TOKEN')
 if not token:
@@ -1,219 +1,537 @@
-from itertools import combinations, permutations
 import random
-from collections import defaultdict, Counter
-import numpy as np
+from collections import Counter
 import csv
+import json
 import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
 
-random.seed(5)
+import numpy as np
 
-# Configuration
+from scheduling.analysis import analyze_schedule, score_schedules
+from scheduling.anneal import improve_schedule
+from scheduling.metrics import schedule_metrics, metrics_key, print_schedule_metrics
+from scheduling.pair_counts import PairCounts
+from scheduling.reschedule import played_cutoff
+from scheduling.round_dp import dp_tables
+from scheduling.round_search import BACKENDS, DP_MAX_SEATS, partition_round
+from scheduling.schedule_io import read_schedule_csv, write_schedule_csv
+from scheduling.seating import SeatCounts, seat_round, reseat_schedule
+from utils import instrument
+from utils.instrument import profile_main, timed
+
+# Default configuration
+SEED = 5
 NUM_PLAYERS = 11
-PLAYERS = list(range(1,NUM_PLAYERS+1))
-MAX_SIMUL_GAMES = NUM_PLAYERS // 4
-SIMUL_PLAYERS = MAX_SIMUL_GAMES * 4
 
 # Rounds are sets of games played simultaneously.
 WEEKS = 6
 ROUNDS_PER_WEEK = 11
-ROUNDS = WEEKS * ROUNDS_PER_WEEK
-
-# Check if it is possible each player will play an equal number of games
-# Warns if not possible
-TOTAL_SPOTS = ROUNDS * SIMUL_PLAYERS
-if TOTAL_SPOTS % NUM_PLAYERS != 0:
-    print("Warning: Not all players can play an equal number of games.")
-    games_per_player = TOTAL_SPOTS // NUM_PLAYERS
-    
-    # Find closest rounds that work
-    # Using math/gcd: valid rounds r are multiples of L = NUM_PLAYERS / gcd(NUM_PLAYERS, SIMUL_PLAYERS)
-    L = NUM_PLAYERS // math.gcd(NUM_PLAYERS, SIMUL_PLAYERS)
-    rounds_lower = (ROUNDS // L) * L
-    rounds_higher = ((ROUNDS + L - 1) // L) * L
-    
-    print(f"Current rounds: {ROUNDS}, games per player: {games_per_player}")
-    print(f"Closest lower rounds: {rounds_lower} (games per player: {(rounds_lower * SIMUL_PLAYERS) // NUM_PLAYERS})")
-    print(f"Closest higher rounds: {rounds_higher} (games per player: {(rounds_higher * SIMUL_PLAYERS) // NUM_PLAYERS})")
 
 # grouping_cost = sum of all pair_counts for pairs in the group
 def grouping_cost(grouping, pair_counts):
-    return sum(pair_counts[(a, b)] for game in grouping for a, b in combinations(game, 2))
-
-# seating_cost = sum of seat_counts for each player in their seat
-def seating_cost(game, seat_counts):
-    return sum(seat_counts[game[i]][i] for i in range(4))
-
-def add_round(games_played: Counter, pair_counts: Counter, seat_counts: defaultdict) -> None:
-    # First chooses the SIMUL_PLAYERS players with the least games_played.
-
-    least_played = games_played.most_common()[::-1]
-
-    maximum = least_played[SIMUL_PLAYERS-1][1]
-
-    # Guaranteed if games played < maximum, can pick if == maximum
-    guaranteed, possible = [], []
-    for p, count in least_played:
-        if count < maximum:
-            guaranteed.append(p)
-        elif count == maximum:
-            possible.append(p)
-    random.shuffle(possible)
-
-    selected = guaranteed + possible[:SIMUL_PLAYERS - len(guaranteed)]
-    random.shuffle(selected)
-
-    ### I used to simulate every permutation, but that grows fast so I asked GPT and it gave this answer
-    # I have no idea what's going on tbh
-
-    # Partition selected players into groups of 4 minimizing sum of pair_counts within groups
-    # Exact DP over subsets: O(2^n * n^3), fine for n=12
-    n = len(selected)
-    idx_of = {p: i for i, p in enumerate(selected)}
-    players_by_idx = selected
-
-    # Precompute cost of each 4-set (by indices) once per round
-    def quad_cost_of_players(ps):
-        # sum of 6 pair costs
-        a,b,c,d = ps
-        pc = pair_counts
-        return (pc[(min(a,b), max(a,b))] + pc[(min(a,c), max(a,c))] + pc[(min(a,d), max(a,d))] +
-                pc[(min(b,c), max(b,c))] + pc[(min(b,d), max(b,d))] + pc[(min(c,d), max(c,d))])
-
-    quad_cost_map = {}
-    for quad in combinations(range(n), 4):  # (i,a,b,c) indices, already sorted
-        ps = tuple(players_by_idx[i] for i in quad)
-        quad_cost_map[quad] = quad_cost_of_players(ps)
-
-    def quad_cost(idxs):
-        # idxs is a sorted 4-tuple (i,a,b,c)
-        return quad_cost_map[idxs]
-
-    from math import inf
-    full_mask = (1 << n) - 1
-    dp = [inf] * (1 << n)
-    parent = [None] * (1 << n)  # stores (prev_mask, quad_indices_tuple)
-    dp[0] = 0
-
-    for mask in range(1 << n):
-        if dp[mask] == inf:
-            continue
-        # pick first unused index to anchor combinations
+    return sum(pair_counts.group_cost(game) for game in grouping)
+
+class Scheduler:
+    """
+    Builds a season round by round. Each round seats the players with the fewest games so far,
+    split into groups of 4 with the fewest repeat matchups, seated to balance seat usage.
+
+    Instances are independent, so several configurations can run in one process.
+    """
+
+    def __init__(self, num_players=NUM_PLAYERS, weeks=WEEKS, rounds_per_week=ROUNDS_PER_WEEK, seed=SEED, verbose=False,
+                 table_cache=None, partition="auto"):
+        self.num_players = num_players
+        self.players = list(range(1, num_players + 1))
+        self.max_simul_games = num_players // 4
+        self.simul_players = self.max_simul_games * 4
+        self.weeks = weeks
+        self.rounds_per_week = rounds_per_week
+        self.rounds = weeks * rounds_per_week
+        self.seed = seed
+        self.verbose = verbose
+        self.table_cache = table_cache  # optional directory for the per-n DP tables (.npz)
+        self.partition = partition  # round grouping backend, see scheduling.round_search
+        self.week_cap = None  # games per player per week, only enforced by reschedule
+        self.reset()
+
+    def reset(self):
+        self.rng = random.Random(self.seed)
+        self.games_played = Counter({s: 0 for s in self.players})
+        self.pair_counts = PairCounts(self.num_players)
+        self.seat_counts = SeatCounts(self.num_players)  # seat_counts[player][seat] = count
+        self.week_games = Counter()  # games in the current week, against week_cap
+
+    def equal_games_warning(self):
+        # Check if it is possible each player will play an equal number of games
+        total_spots = self.rounds * self.simul_players
+        if total_spots % self.num_players == 0:
+            return None
+
+        games_per_player = total_spots // self.num_players
+
+        # Find closest rounds that work
+        # Using math/gcd: valid rounds r are multiples of L = num_players / gcd(num_players, simul_players)
+        L = self.num_players // math.gcd(self.num_players, self.simul_players)
+        rounds_lower = (self.rounds // L) * L
+        rounds_higher = ((self.rounds + L - 1) // L) * L
+
+        return "\n".join([
+            "Warning: Not all players can play an equal number of games.",
+            f"Current rounds: {self.rounds}, games per player: {games_per_player}",
+            f"Closest lower rounds: {rounds_lower} (games per player: {(rounds_lower * self.simul_players) // self.num_players})",
+            f"Closest higher rounds: {rounds_higher} (games per player: {(rounds_higher * self.simul_players) // self.num_players})",
+        ])
+
+    def add_round(self):
+        # Phases are timed as round_phase{phase=select|dp|seating|update} (see utils.instrument)
+        with timed("round_phase", phase="select"):
+            # First chooses the simul_players players with the least games_played.
+            least_played = self.games_played.most_common()[::-1]
+            if self.week_cap is not None:
+                # Players at their weekly quota come last, so they only play if nobody else can
+                least_played = sorted(((p, (self.week_games[p] >= self.week_cap, count)) for p, count in least_played),
+                                      key=lambda pc: pc[1][0])
+
+            maximum = least_played[self.simul_players-1][1]
+
+            # Guaranteed if games played < maximum, can pick if == maximum
+            guaranteed, possible = [], []
+            for p, count in least_played:
+                if count < maximum:
+                    guaranteed.append(p)
+                elif count == maximum:
+                    possible.append(p)
+            self.rng.shuffle(possible)
+
+            selected = guaranteed + possible[:self.simul_players - len(guaranteed)]
+            self.rng.shuffle(selected)
+
+        with timed("round_phase", phase="dp"):
+            # Partition selected players into groups of 4 minimizing sum of pair_counts within groups.
+            # Exact DP over subsets (scheduling.round_dp), or branch and bound for large rounds.
+            cost = self.pair_counts.matrix(selected)
+            grouping = partition_round(cost, self.partition, self.table_cache)
+            best_grouping = [tuple(selected[i] for i in quad) for quad in grouping]
+
+        with timed("round_phase", phase="seating"):
+            # Seat every game of the round at once to balance seat usage (also records the seats)
+            best_grouping = seat_round(best_grouping, self.seat_counts)  # tuples of 4 players in seat order
+
+        with timed("round_phase", phase="update"):
+            for game in best_grouping:
+                for p in game:
+                    self.games_played[p] += 1
+                    self.week_games[p] += 1
+                self.pair_counts.add_game(game)
+
+        return best_grouping
+
+    def create_schedule(self):
+        self.reset()
+        if self.verbose and self.equal_games_warning():
+            print(self.equal_games_warning())
+
+        # Schedule is a list of rounds, each round contains max_simul_games tuples of 4 numbers.
+        # [[(1,2,3,4),(5,6,7,8)],[(1,3,5,7),(2,4,6,8)],...]
+        schedule = []
+
+        for i in range(self.rounds):
+            schedule.append(self.add_round())
+            if self.verbose:
+                pc = self.pair_counts
+                print(f"Round {i + 1}/{self.rounds}: matchup std {pc.std():.4f}, min {pc.min()}, max {pc.max()}")
+
+        if self.verbose:
+            print_schedule_metrics(schedule_metrics(self.pair_counts, self.seat_counts, self.players))
+
+        return schedule
+
+    def resume(self, played_games, players=None, games_per_round=None):
+        """
+        Continues a season from the games already played (a flat list of seat-ordered games):
+        they are replayed once, in one batch, into games_played, pair_counts and seat_counts, and
+        `players` (default: the current players) becomes the set add_round draws from. Players
+        joining mid-season start level with the fewest games among those continuing, so they are
+        not put in every round to catch up. games_per_round keeps the shape of the schedule being
+        continued (e.g. 1 for one game per match); by default rounds seat as many as they can.
+        """
+        players = sorted(set(self.players if players is None else players))
+        if len(players) < 4:
+            raise ValueError("At least 4 players are needed to schedule games.")
+        played_games = [tuple(game) for game in played_games]
+
+        # Count matrices cover every id seen, including players who have dropped out
+        self.num_players = max([*players, *(p for game in played_games for p in game)])
+        self.reset()
+        played, self.pair_counts, self.seat_counts = self.count_games(played_games)
+
+        continuing = [played[p] for p in players if played[p] > 0]
+        level = min(continuing, default=0)
+        self.players = players
+        self.games_played = Counter({p: played[p] if played[p] > 0 else level for p in players})
+        self.max_simul_games = len(players) // 4
+        if games_per_round is not None:
+            if games_per_round < 1:
+                raise ValueError("games_per_round must be at least 1.")
+            self.max_simul_games = min(self.max_simul_games, games_per_round)
+        self.simul_players = self.max_simul_games * 4
+
+    def reschedule(self, played_rounds, rounds, players=None, games_per_round=None, weeks=None, week_cap=None):
+        """
+        The next `rounds` rounds after played_rounds (a schedule prefix), for the given players.
+        With weeks (the week of every round, played and new) and week_cap, players are kept to
+        week_cap games a week, counting the played games of a week the cutoff falls in.
+        """
+        self.resume([game for round_games in played_rounds for game in round_games], players, games_per_round)
+        self.week_cap = week_cap if weeks is not None else None
+        new_rounds = []
         try:
-            i = next(k for k in range(n) if not (mask >> k) & 1)
-        except StopIteration:
-            continue  # mask is full
-        rest = [j for j in range(i + 1, n) if not (mask >> j) & 1]
-        for a, b, c in combinations(rest, 3):
-            quad = (i, a, b, c)
-            new_mask = mask | (1 << i) | (1 << a) | (1 << b) | (1 << c)
-            cost = dp[mask] + quad_cost(quad)
-            if cost < dp[new_mask]:
-                dp[new_mask] = cost
-                parent[new_mask] = (mask, quad)
-
-    # Reconstruct best grouping of indices, then map to player IDs
-    grouping_indices = []
-    cur = full_mask
-    while cur and parent[cur] is not None:
-        prev, quad = parent[cur]
-        grouping_indices.append(tuple(players_by_idx[i] for i in quad))
-        cur = prev
-    best_grouping = list(reversed(grouping_indices))  # list of 3 tuples (each len 4)
-
-    # Seat each game to balance seat usage
-    for i in range(MAX_SIMUL_GAMES):
-        game = best_grouping[i]
-        best_seating = min(permutations(game), key=lambda g: seating_cost(g, seat_counts))
-        best_grouping[i] = best_seating  # tuple of 4 players in seat order
-
-    # Update counts
-    for game in best_grouping:
-        for p in game:
-            games_played[p] += 1
-        for a, b in combinations(game, 2):
-            k = (a, b) if a < b else (b, a)
-            pair_counts[k] += 1
-        for seat in range(4):
-            seat_counts[game[seat]][seat] += 1
-
-    return best_grouping
-
-def create_schedule():
-
-
-    games_played = Counter({s: 0 for s in PLAYERS})
-    pair_counts = Counter({(p1, p2): 0 for p1 in PLAYERS for p2 in PLAYERS if p1 < p2})
-    seat_counts = defaultdict(lambda: Counter({i: 0 for i in range(4)}))  # seat_counts[player][seat] = count
-
-    # Schedule is a list of rounds, each round contains MAX_SIMUL_GAMES lists of 4 numbers.
-    # [[[1,2,3,4],[5,6,7,8]],[[1,3,5,7],[2,4,6,8]],...]
-    schedule = []
-
-    for i in range(ROUNDS):
-        print(i)
-        schedule.append(add_round(games_played, pair_counts, seat_counts))
-
-    
-    print("Best schedule analysis:")
-    print(f"Standard deviation of matchup distribution: {np.std(list(pair_counts.values())):.4f}")
-    print(f"Highest matchup count: {max(pair_counts.values())}")
-    print(f"Lowest matchup count: {min(pair_counts.values())}")
-    overall_seat_counts = [seat_counts[p][s] for p in PLAYERS for s in range(4)]
-    print(f"Standard deviation of seat distribution (overall): {np.std(overall_seat_counts):.4f}")
-    print(f"Highest seat count: {max(overall_seat_counts)}")
-    print(f"Lowest seat count: {min(overall_seat_counts)}")
-
-    return schedule
-
-def save_schedule_to_csv(schedule, filename="schedule.csv"):
-    headers = ["match_id", "week", "east seat", "south seat", "west seat", "north seat"]
-    with open(filename, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        for r_idx, round_games in enumerate(schedule):
-            week = (r_idx // ROUNDS_PER_WEEK) + 1
-            round_in_week = (r_idx % ROUNDS_PER_WEEK) + 1
-            match_id = r_idx + 1
-            for g_idx, game in enumerate(round_games, start=1):
-                seats = list(game)  # (p0, p1, p2, p3)
-                writer.writerow([match_id, week, *seats])
-
-#columns - # of columns to ignore
-def analyze_schedule(path):
-
-    games_played = Counter({s: 0 for s in PLAYERS})
-    pair_counts = Counter({(p1, p2): 0 for p1 in PLAYERS for p2 in PLAYERS if p1 < p2})
-    seat_counts = defaultdict(lambda: Counter({i: 0 for i in range(4)}))  # seat_counts[player][seat] = count
+            for r in range(len(played_rounds), len(played_rounds) + rounds):
+                if self.week_cap is not None and (r == len(played_rounds) or weeks[r] != weeks[r - 1]):
+                    self.week_games = Counter(p for i, round_games in enumerate(played_rounds) if weeks[i] == weeks[r]
+                                              for game in round_games for p in game)
+                new_rounds.append(self.add_round())
+        finally:
+            self.week_cap = None
 
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                players = [row.get(k) for k in ("east seat", "south seat", "west seat", "north seat")]
-                for p, i in zip(players , range(4)):
-                    p = int(p)
-                    games_played[p] += 1
-                    seat_counts[p][i] += 1
-                for a, b in combinations(players, 2):
-                    a, b = int(a), int(b)
-                    k = (a, b) if a < b else (b, a)
-                    pair_counts[k] += 1
-    
-    except Exception as e:
-        print(f"Error analyzing schedule: {e}")
-
-    print(pair_counts)
-    print(games_played)
-    print(seat_counts)
-    print("Best schedule analysis:")
-    print(f"Standard deviation of matchup distribution: {np.std(list(pair_counts.values())):.4f}")
-    print(f"Highest matchup count: {max(pair_counts.values())}")
-    print(f"Lowest matchup count: {min(pair_counts.values())}")
-    overall_seat_counts = [seat_counts[p][s] for p in PLAYERS for s in range(4)]
-    print(f"Standard deviation of seat distribution (overall): {np.std(overall_seat_counts):.4f}")
-    print(f"Highest seat count: {max(overall_seat_counts)}")
-    print(f"Lowest seat count: {min(overall_seat_counts)}")
-
-schedule = create_schedule()
-save_schedule_to_csv(schedule, "schedule.csv")
+        if self.verbose:
+            print_schedule_metrics(schedule_metrics(self.pair_counts, self.seat_counts, self.players))
+
+        return new_rounds
+
+    def schedule_weeks(self, schedule):
+        return [(r_idx // self.rounds_per_week) + 1 for r_idx in range(len(schedule))]
+
+    def save(self, schedule, filename="schedule.csv"):
+        write_schedule_csv(schedule, self.schedule_weeks(schedule), filename)
 
+    def count_games(self, games):
+        # Rebuilds games_played, pair_counts and seat_counts from a flat list of seat-ordered games
+        games_played = Counter({s: 0 for s in self.players})
+        pair_counts = PairCounts(self.num_players)
+        seat_counts = SeatCounts(self.num_players)
+
+        games_played.update(p for game in games for p in game)
+        pair_counts.add_games(games)
+        seat_counts.add_games(games)
+
+        return games_played, pair_counts, seat_counts
+
+    def score(self, schedule):
+        _, pair_counts, seat_counts = self.count_games([game for round_games in schedule for game in round_games])
+        return schedule_metrics(pair_counts, seat_counts, self.players)
+
+    def analyze(self, path):
+        # Prints the analysis of a schedule CSV; returns the full report (see scheduling.analysis)
+        try:
+            report = analyze_schedule(path, self.num_players)
+        except OSError as e:
+            print(f"Error analyzing schedule: {e}")
+            return None
+
+        print(np.array(report["pair_matrix"]))
+        print(Counter(dict(enumerate(report["games_per_player"], start=1))))
+        print(np.array(report["seat_matrix"]))
+        print_schedule_metrics(report["metrics"])
+        print(f"Back-to-back games: {report['rest']['back_to_back']}, longest rest: {report['rest']['max_gap']} rounds")
+        return report
+
+def _search_trial(config, seed):
+    # Runs in a worker process; its timings go back to the parent with the result
+    instrument.reset()
+    scheduler = Scheduler(**config, seed=seed)
+    schedule = scheduler.create_schedule()
+    return seed, schedule, scheduler.score(schedule), instrument.snapshot()
+
+def search_schedules(trials, workers=None, budget=None, target_std=None, base_seed=SEED, **config):
+    """
+    Runs Scheduler(**config).create_schedule with seeds base_seed, base_seed + 1, ... across
+    worker processes and keeps the best result by (matchup std, seat std).
+
+    Stops after `trials` schedules, after `budget` seconds, or as soon as a schedule with
+    matchup std <= target_std turns up, whichever comes first.
+    Returns (seed, schedule, metrics) of the best schedule.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.monotonic()
+    deadline = None if budget is None else start + budget
+    seeds = iter(range(base_seed, base_seed + trials))
+    best = None
+    done = 0
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Keep a couple of trials queued per worker so stopping early wastes little work
+        pending = set()
+        def refill():
+            for seed in seeds:
+                pending.add(executor.submit(_search_trial, config, seed))
+                if len(pending) >= 2 * workers:
+                    break
+
+        refill()
+        while pending:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            finished, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                seed, schedule, metrics, timings = future.result()
+                instrument.merge(timings)
+                done += 1
+                if best is None or metrics_key(metrics) < metrics_key(best[2]):
+                    best = (seed, schedule, metrics)
+                    print(f"Trial {done}: seed {seed} is the new best (matchup std {metrics['matchup_std']:.4f}, seat std {metrics['seat_std']:.4f})")
+
+            out_of_time = deadline is not None and time.monotonic() >= deadline
+            hit_target = target_std is not None and best is not None and best[2]["matchup_std"] <= target_std
+            if out_of_time or hit_target:
+                print(f"Stopping after {done} trials ({'target reached' if hit_target else 'time budget used'}).")
+                break
+
+            refill()
+    finally:
+        # Drop queued trials and return without waiting for the ones still running, so a
+        # budget or target stop is not held up by trials that would finish after it
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    print(f"Explored {done} schedules in {time.monotonic() - start:.1f}s.")
+    if best is None:
+        raise RuntimeError("No schedule finished within the time budget.")
+    return best
+
+# Manifest columns / keys for batch scheduling; only name and players are required
+DIVISION_DEFAULTS = {"weeks": WEEKS, "rounds_per_week": ROUNDS_PER_WEEK, "seed": SEED}
+
+SUMMARY_COLUMNS = [
+    "name", "players", "weeks", "rounds_per_week", "seed", "output", "rounds", "games",
+    "games_per_player_min", "games_per_player_max", "matchup_std", "matchup_min", "matchup_max",
+    "seat_std", "seat_min", "seat_max", "seconds",
+]
+
+def read_manifest(path, out_dir="."):
+    """
+    Divisions to schedule, from a CSV (columns name, players and optionally weeks, rounds_per_week,
+    seed, output) or a JSON list of objects with the same keys. Missing outputs default to
+    out_dir/schedule_<name>.csv.
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        entries = json.load(f) if path.endswith(".json") else list(csv.DictReader(f))
+
+    divisions, names = [], set()
+    for entry in entries:
+        entry = {k: v for k, v in entry.items() if v not in ("", None)}
+        name = str(entry.get("name", "")).strip()
+        if not name or name in names:
+            raise ValueError(f"Every division in {path} needs a unique name (got {name!r}).")
+        names.add(name)
+
+        division = {"name": name, "players": int(entry["players"])}
+        for key, default in DIVISION_DEFAULTS.items():
+            division[key] = int(entry.get(key, default))
+        division["output"] = entry.get("output") or os.path.join(out_dir, f"schedule_{name}.csv")
+        if division["players"] < 4:
+            raise ValueError(f"Division {name} has fewer than 4 players.")
+        divisions.append(division)
+    return divisions
+
+def _division_job(division, table_cache, partition):
+    # Runs in a worker process: schedules one division, writes its CSV and returns its summary row
+    instrument.reset()
+    start = time.perf_counter()
+    scheduler = Scheduler(num_players=division["players"], weeks=division["weeks"],
+                          rounds_per_week=division["rounds_per_week"], seed=division["seed"], table_cache=table_cache,
+                          partition=partition)
+    schedule = scheduler.create_schedule()
+    scheduler.save(schedule, division["output"])
+
+    played = scheduler.games_played.values()
+    summary = {
+        **division,
+        "rounds": len(schedule),
+        "games": sum(len(round_games) for round_games in schedule),
+        "games_per_player_min": min(played),
+        "games_per_player_max": max(played),
+        **schedule_metrics(scheduler.pair_counts, scheduler.seat_counts, scheduler.players),
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+    return summary, instrument.snapshot()
+
+def schedule_divisions(divisions, workers=None, table_cache=None, partition="auto"):
+    """
+    Schedules every division (see read_manifest) across worker processes, writing one CSV each.
+    Returns their summary rows in manifest order.
+
+    The DP tables for each distinct seat count are built (or loaded from table_cache) once here
+    before the workers start, so forked workers share them instead of each building its own; with
+    a spawn start method only table_cache avoids rebuilding them. The largest divisions are
+    submitted first, so the batch takes about as long as the slowest division.
+    """
+    for seats in sorted({(d["players"] // 4) * 4 for d in divisions}):
+        if partition == "dp" or (partition == "auto" and seats <= DP_MAX_SEATS):
+            dp_tables(seats, table_cache)
+
+    workers = min(workers or os.cpu_count() or 1, len(divisions)) or 1
+    order = sorted(range(len(divisions)), key=lambda i: -divisions[i]["players"])
+    summaries = [None] * len(divisions)
+
+    if workers == 1:
+        jobs = ((i, _division_job(divisions[i], table_cache, partition)) for i in order)
+        for i, (summary, _) in jobs:
+            summaries[i] = summary
+        return summaries
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_division_job, divisions[i], table_cache, partition): i for i in order}
+        for future in futures:
+            summary, timings = future.result()
+            instrument.merge(timings)
+            summaries[futures[future]] = summary
+    return summaries
+
+def write_summary(summaries, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(summaries)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a balanced league schedule")
+    parser.add_argument("--players", type=int, default=NUM_PLAYERS, help="Number of players (or teams)")
+    parser.add_argument("--weeks", type=int, default=WEEKS)
+    parser.add_argument("--rounds-per-week", type=int, default=ROUNDS_PER_WEEK, help="Rounds of simultaneous games per week")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", default="schedule.csv", help="CSV file to write the schedule to")
+    parser.add_argument("--table-cache", default=os.getenv("MJS_DP_TABLE_CACHE"),
+                        help="Directory to keep the per-player-count DP tables in (.npz)")
+    parser.add_argument("--partition", choices=BACKENDS, default="auto",
+                        help=f"Round grouping: subset DP, branch and bound, or OR-Tools CP-SAT (auto: dp up to {DP_MAX_SEATS} seats, bnb above)")
+    sub = parser.add_subparsers(dest="cmd")
+
+    sub.add_parser("generate", help="Generate one schedule (default)")
+
+    p_search = sub.add_parser("search", help="Try many seeds in parallel (from --seed up) and keep the best schedule")
+    p_search.add_argument("--trials", type=int, default=64, help="Maximum number of seeds to try")
+    p_search.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p_search.add_argument("--budget", type=float, default=None, help="Wall-clock budget in seconds")
+    p_search.add_argument("--target-std", type=float, default=None, help="Stop once a schedule reaches this matchup std")
+
+    p_improve = sub.add_parser("improve", help="Improve a finished schedule with simulated annealing")
+    p_improve.add_argument("--input", default=None, help="Schedule CSV to improve (default: generate one first)")
+    p_improve.add_argument("--budget", type=float, default=10.0, help="Time budget in seconds")
+    p_improve.add_argument("--scope", choices=["round", "week"], default="round",
+                           help="Swap players between games of the same round, or of the same week")
+
+    p_reseat = sub.add_parser("reseat", help="Re-balance seats across a whole schedule without changing the games")
+    p_reseat.add_argument("--input", default="schedule.csv", help="Schedule CSV to re-seat")
+
+    p_resched = sub.add_parser("reschedule", help="Keep the played part of a schedule and regenerate the rest")
+    p_resched.add_argument("--input", default="schedule.csv", help="Schedule CSV being played")
+    p_resched.add_argument("--results", default=None,
+                           help="Wide results CSV from export_results_csv; rounds up to the last played game are kept")
+    p_resched.add_argument("--played", type=int, default=None, help="Number of rounds to keep (instead of --results)")
+    p_resched.add_argument("--drop", type=int, nargs="+", default=[], help="Ids leaving for the rest of the season")
+    p_resched.add_argument("--add", type=int, nargs="+", default=[], help="Ids joining for the rest of the season")
+    p_resched.add_argument("--shift-weeks", type=int, default=0, help="Move the regenerated rounds this many weeks later")
+
+    p_batch = sub.add_parser("batch", help="Schedule every division of a manifest in parallel")
+    p_batch.add_argument("manifest", help="CSV or JSON list of divisions: name, players[, weeks, rounds_per_week, seed, output]")
+    p_batch.add_argument("--out-dir", default="schedules", help="Where schedule_<name>.csv files go by default")
+    p_batch.add_argument("--summary", default=None, help="Combined summary CSV (default: OUT_DIR/summary.csv)")
+    p_batch.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+
+    p_analyze = sub.add_parser("analyze", help="Print matchup and seat statistics of a schedule CSV, or rank several")
+    p_analyze.add_argument("input", nargs="*", default=["schedule.csv"])
+    p_analyze.add_argument("--json", help="Also write the report (one input) or ranking (several) to this JSON file")
+    p_analyze.add_argument("--workers", type=int, default=None, help="Worker processes when ranking many CSVs")
+
+    args = parser.parse_args(argv)
+    config = {"num_players": args.players, "weeks": args.weeks, "rounds_per_week": args.rounds_per_week,
+              "table_cache": args.table_cache, "partition": args.partition}
+    scheduler = Scheduler(**config, seed=args.seed, verbose=True)
+
+    if args.cmd == "analyze":
+        if len(args.input) == 1:
+            result = scheduler.analyze(args.input[0])
+        else:
+            result = score_schedules(args.input, args.players, args.workers)
+            for rank, s in enumerate(result, start=1):
+                print(f"{rank:4d}. {s['path']}: matchup std {s['matchup_std']:.4f}, seat std {s['seat_std']:.4f}, "
+                      f"back-to-back {s['back_to_back']}")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=1)
+        return
+
+    if args.cmd == "batch":
+        divisions = read_manifest(args.manifest, args.out_dir)
+        os.makedirs(args.out_dir, exist_ok=True)
+        start = time.perf_counter()
+        summaries = schedule_divisions(divisions, args.workers, args.table_cache, args.partition)
+        summary_path = args.summary or os.path.join(args.out_dir, "summary.csv")
+        write_summary(summaries, summary_path)
+        for s in summaries:
+            print(f"{s['name']}: {s['players']} players, {s['rounds']} rounds, matchup std {s['matchup_std']:.4f}, "
+                  f"seat std {s['seat_std']:.4f} ({s['seconds']:.2f}s) -> {s['output']}")
+        print(f"Scheduled {len(summaries)} divisions in {time.perf_counter() - start:.2f}s; summary saved to {summary_path}")
+        return
+
+    if args.cmd == "search":
+        seed, schedule, metrics = search_schedules(args.trials, args.workers, args.budget, args.target_std, args.seed, **config)
+        weeks = scheduler.schedule_weeks(schedule)
+        print(f"Best seed: {seed}")
+        print_schedule_metrics(metrics)
+    elif args.cmd == "improve":
+        if args.input:
+            schedule, weeks = read_schedule_csv(args.input)
+        else:
+            scheduler.verbose = False
+            schedule = scheduler.create_schedule()
+            weeks = scheduler.schedule_weeks(schedule)
+        schedule, _ = improve_schedule(schedule, weeks, budget=args.budget, scope=args.scope, seed=args.seed)
+    elif args.cmd == "reschedule":
+        schedule, weeks = read_schedule_csv(args.input)
+        if args.played is not None:
+            keep = args.played
+        elif args.results:
+            import read_csv
+            keep, unmatched = played_cutoff(schedule, read_csv.get_result_games(args.results))
+            if unmatched:
+                print(f"Warning: {unmatched} played games are not in {args.input}.")
+        else:
+            parser.error("reschedule needs --results or --played")
+
+        players = (set(p for round_games in schedule for game in round_games for p in game) | set(args.add)) - set(args.drop)
+        start = time.perf_counter()
+        # Regenerated rounds keep the input's shape: as many games per round (schedule.csv has
+        # one game per match_id) and the weekly quota a full week of the input spreads evenly
+        games_per_round = max(len(round_games) for round_games in schedule)
+        week_sizes = Counter()
+        for week, round_games in zip(weeks, schedule):
+            week_sizes[week] += len(round_games)
+        week_cap = math.ceil(4 * max(week_sizes.values()) / len(players))
+        weeks = weeks[:keep] + [w + args.shift_weeks for w in weeks[keep:]]
+        new_rounds = scheduler.reschedule(schedule[:keep], len(schedule) - keep, players, games_per_round, weeks, week_cap)
+        print(f"Kept {keep} rounds, regenerated {len(new_rounds)} for {len(players)} players in {time.perf_counter() - start:.3f}s.")
+        schedule = schedule[:keep] + new_rounds
+    elif args.cmd == "reseat":
+        schedule, weeks = read_schedule_csv(args.input)
+        print("Before:")
+        print_schedule_metrics(scheduler.score(schedule))
+        schedule, _ = reseat_schedule(schedule)
+        print("After:")
+        print_schedule_metrics(scheduler.score(schedule))
+    else:
+        schedule = scheduler.create_schedule()
+        weeks = scheduler.schedule_weeks(schedule)
+    write_schedule_csv(schedule, weeks, args.output)
+    print(f"Schedule saved to {args.output}")
+
+if __name__ == "__main__":
+    profile_main(main)
@@ -0,0 +1,112 @@
+import asyncio
+import match_helpers
+from match_helpers import WaitingRoom, schedule_store, start_match, team_names
+
+# Long-running alternative to one `match_helpers.py start-match-index` job per match.
+# The schedule, teams and auth token are loaded once. Every tick takes one waiting-room
+# snapshot, picks every not-yet-started game of the current round whose four teams are
+# present (each player in at most one game), and sends those create_game_plan calls
+# concurrently. Set DRY_RUN=1 to only print the payloads; with MJS_API_ROOT and MJS_TOKEN
+# it can run entirely against a local mock server.
+
+DEFAULT_INTERVAL = 30.0
+
+
+def num_rounds():
+    return len(schedule_store.by_round)
+
+
+class MatchDispatcher:
+    def __init__(self, round_index, interval=DEFAULT_INTERVAL, advance=False, max_concurrency=8):
+        if round_index < 1 or round_index > num_rounds():
+            raise ValueError(f"Round index {round_index} out of range (1-{num_rounds()}).")
+        self.round_index = round_index
+        self.interval = interval
+        self.advance = advance
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # Games of the current round (0-based within the round) that have a game plan
+        self.started = set()
+        # Players put into a game who are still showing in the room (it can lag, and in dry runs
+        # they never leave); they are free again once a snapshot no longer lists them
+        self.placed = set()
+
+    @property
+    def round_games(self):
+        # Games sharing the round's match_id, played simultaneously
+        return schedule_store.round_games(self.round_index)
+
+    def ready_games(self, room):
+        # (game index, players) for every startable game, earlier games first
+        ready, taken = [], set(self.placed)
+        for g, team_indexes in enumerate(self.round_games):
+            if g in self.started:
+                continue
+            players = room.players_for(team_indexes, taken)
+            if len(players) == 4:
+                taken.update(players)
+                ready.append((g, players))
+        return ready
+
+    async def _start(self, g, players):
+        async with self.semaphore:
+            teams = [team_names[i - 1] for i in self.round_games[g]]
+            print(f"Round {self.round_index} game {g + 1}: starting {teams}")
+            return await asyncio.to_thread(start_match, players)
+
+    async def tick(self):
+        """
+        One poll: returns the game indexes started this tick. A failed start is left for the next
+        tick; if the server did create it anyway, those players are no longer in the room.
+        """
+        room = await asyncio.to_thread(WaitingRoom.fetch)
+        self.placed &= set(room.account_ids.values())
+        ready = self.ready_games(room)
+        results = await asyncio.gather(*(self._start(g, players) for g, players in ready), return_exceptions=True)
+
+        started = []
+        for (g, players), result in zip(ready, results):
+            if isinstance(result, Exception):
+                print(f"Round {self.round_index} game {g + 1}: failed to start ({result})")
+            else:
+                self.started.add(g)
+                self.placed.update(players)
+                started.append(g)
+        return started
+
+    def round_done(self):
+        return len(self.started) == len(self.round_games)
+
+    async def run(self, max_ticks=None):
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            ticks += 1
+            await self.tick()
+            if self.round_done():
+                print(f"Every game of round {self.round_index} has started.")
+                if not self.advance or self.round_index == num_rounds():
+                    return
+                self.round_index += 1
+                self.started = set()
+                continue
+            await asyncio.sleep(self.interval)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Start every ready match of a round as players arrive")
+    parser.add_argument("round_index", type=int, help="Round index (1-based)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Seconds between waiting-room polls")
+    parser.add_argument("--advance", action="store_true", help="Move on to the next round once every game has started")
+    parser.add_argument("--max-ticks", type=int, help="Stop after this many polls")
+    args = parser.parse_args(argv)
+
+    print(f"Dispatching for contest {match_helpers.CONTEST_ID} season {match_helpers.SEASON_ID}")
+    dispatcher = MatchDispatcher(args.round_index, interval=args.interval, advance=args.advance)
+    try:
+        asyncio.run(dispatcher.run(max_ticks=args.max_ticks))
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
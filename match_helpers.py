@@ -1,67 +1,81 @@
 from time import time
-import requests
 import os
-import auth
+import sys
 import read_csv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from utils.api import mjs_get, mjs_post
+
 teams, team_names = read_csv.get_teams()
 if not teams: raise ValueError("No teams found in CSV.")
 
-schedule = read_csv.get_schedule()
-if not schedule: raise ValueError("No schedule found in CSV.")
+schedule_store = read_csv.get_schedule_store()
+if not schedule_store: raise ValueError("No schedule found in CSV.")
 
 #Checks whether schedule is valid (team indexes in range)
-for round_games in schedule:
-    for game in round_games:
-        for t in game:
-            if t <= 0 or t > len(team_names):
-                raise ValueError(f"Invalid team index {t} in schedule.")
+if schedule_store.seats.min() <= 0 or schedule_store.seats.max() > len(team_names):
+    bad = schedule_store.seats[(schedule_store.seats <= 0) | (schedule_store.seats > len(team_names))]
+    raise ValueError(f"Invalid team index {int(bad[0])} in schedule.")
 
-MJS_DANIEL_MYSTERY_TOKEN=os.getenv('MJS_SECRET')
 CSV_OUTPUT_DIR=os.getenv('CSV_OUTPUT_DIR', 'output')
-MJS_UID = "42474300"
-CONTEST_ID = "31334372"
+CONTEST_ID = os.getenv('MJS_CONTEST_ID', "31334372")
 SEASON_ID = os.getenv('MJS_SEASON_ID', 1)
 
-TOKEN = auth.get_auth_token(MJS_DANIEL_MYSTERY_TOKEN, MJS_UID)
-if not TOKEN: raise ValueError("Failed to retrieve auth token.")
-
-CONTEST_URL = "https://engs.mahjongsoul.com/api/contest_gate/api"
-CONTEST_HEADERS = {
-    'accept': 'application/json, text/plain, */*',
-    'authorization': f'Majsoul {TOKEN}',
-    'origin': 'https://mahjongsoul.tournament.yo-star.com'
-}
+# Auth goes through utils.auth (MJS_SECRET / MJS_UID), which caches the token and
+# only logs in when a request actually needs it.
+
+# Nickname -> names of the teams it plays for (normally one)
+TEAMS_OF = {}
+for _team_name, _roster in teams.items():
+    for _nickname in _roster:
+        TEAMS_OF.setdefault(_nickname, []).append(_team_name)
+
+class WaitingRoom:
+    """
+    One snapshot of contest/ready_player_list. Fetch it once per tick and resolve every
+    match against it instead of polling per match.
+    """
+
+    def __init__(self, waiting_data):
+        self.waiting_data = waiting_data
+        self.account_ids = {}
+        # team name -> account ids of its players in the room, in waiting-room order
+        self.present = {}
+        for p in waiting_data:
+            self.account_ids.setdefault(p['nickname'], p['account_id'])
+            for team_name in TEAMS_OF.get(p['nickname'], []):
+                self.present.setdefault(team_name, []).append(p['account_id'])
+
+    @classmethod
+    def fetch(cls):
+        params = {
+            "unique_id": CONTEST_ID,  
+            "season_id": SEASON_ID,
+        }
+        response = mjs_get("/ready_player_list", queryparams=params)
+        response.raise_for_status()
+        return cls(response.json()["data"])
+
+    def players_for(self, team_indexes, taken=()):
+        # First present player of each team who is not in `taken`; teams with nobody available are skipped
+        players = []
+        for t in team_indexes:
+            team_name = team_names[t - 1]
+            player = next((a for a in self.present.get(team_name, []) if a not in taken and a not in players), None)
+            if player is not None:
+                players.append(player)
+            else:
+                print(f"No players from team {team_name} ({teams[team_name]}) are in the waiting room.")
+        return players
 
 # Takes a tuple of team indexes and returns a list of player ids if all players are in the waiting room. Otherwise, returns an empty list.
-def get_waiting_players(team_indexes):
-
-    #fetch waiting room
-    WAIT_URL = f"{CONTEST_URL}/contest/ready_player_list"
-    params = {
-        "unique_id": CONTEST_ID,  
-        "season_id": SEASON_ID,
-    }
-    response = requests.get(WAIT_URL, headers=CONTEST_HEADERS, params=params)
-    response.raise_for_status()
-    
-    waiting_data = response.json()["data"]
-
-    players = []
+def get_waiting_players(team_indexes, room=None):
+    room = room or WaitingRoom.fetch()
     print(team_indexes)
-    for t in team_indexes:
-        #check if there is a player in that team in waiting_data
-        team_name = team_names[t - 1]
-        player = [p['account_id'] for p in waiting_data if p['nickname'] in teams[team_name]]
-        if len(player) > 0:
-            players.append(player[0])
-        else:
-            print(f"No players from team {team_name} ({teams[team_name]}) are in the waiting room.")
-
-    return players
+    return room.players_for(team_indexes)
 
 def start_match(players):
-    START_URL = f"{CONTEST_URL}/contest/create_game_plan"
     start_payload = {
         "account_list": players,
         "ai_level": 2, #idk whether to include this if no ai's present.
@@ -78,14 +92,14 @@ def start_match(players):
         print("[DRY_RUN] Would create game plan:", start_payload)
         return {"dry_run": True, "payload": start_payload}
 
-    response = requests.post(START_URL, headers=CONTEST_HEADERS, json=start_payload)
+    response = mjs_post("/create_game_plan", payload=start_payload)
     response.raise_for_status()
     match_data = response.json()
     print(f"Match response: {match_data}")
     return match_data
 
-def match(team_indexes):
-    players = get_waiting_players(team_indexes)
+def match(team_indexes, room=None):
+    players = get_waiting_players(team_indexes, room)
 
     if (len(players) < 4):
         print("Not enough players to start a match.")
@@ -97,40 +111,72 @@ def match(team_indexes):
 
 # Starts only one match
 def start_match_index(round_index,match_index):
-    if match_index < 0 or match_index >= len(schedule):
+    round_games = schedule_store.round_games(round_index)
+    if not round_games:
+        print("Round index out of range.")
+        return
+    if match_index < 1 or match_index > len(round_games):
         print("Match index out of range.")
         return
 
-    round_games = schedule[round_index - 1]
     print(f"Starting match {match_index} for round {round_index}.")
 
     team_indexes = round_games[match_index - 1]
     print(f"Attempting to start match for teams: {[team_names[i - 1] for i in team_indexes]}")
     match(team_indexes)
 
-# DOES NOT WORK WITH CURRENT SCHEDULE FORMAT - INDIVIDUALLY RUN MATCHES USING START_MATCH_INDEX
-"""def start_scheduled_matches(schedule_index):
-    if schedule_index >= len(schedule):
-        print("Schedule index out of range.")
-        return schedule_index
-
-    round_games = schedule[schedule_index]
-    print(f"Starting matches for round {schedule_index + 1} with {len(round_games)} games.")
-
-    for game in round_games:
-        team_indexes = game  # tuple of 4 team indexes
+# Starts the game(s) with this match_id from schedule.csv
+def start_match_id(match_id, room=None):
+    games = schedule_store.match(match_id)
+    if not games:
+        print(f"No match with match_id {match_id}.")
+        return []
+
+    room = room or WaitingRoom.fetch()
+    started, taken = [], set()
+    for team_indexes in games:
+        print(f"Attempting to start match {match_id} for teams: {[team_names[i - 1] for i in team_indexes]}")
+        players = room.players_for(team_indexes, taken)
+        if len(players) < 4:
+            print("Not enough players to start a match.")
+            continue
+        taken.update(players)
+        started.append(start_match(players))
+    return started
+
+# Starts every match of a round whose teams are all in the waiting room, from one snapshot
+def start_scheduled_matches(round_index, room=None):
+    round_games = schedule_store.round_games(round_index)
+    if not round_games:
+        print("Round index out of range.")
+        return []
+
+    room = room or WaitingRoom.fetch()
+    print(f"Starting matches for round {round_index} with {len(round_games)} games.")
+
+    started, taken = [], set()
+    for team_indexes in round_games:
         print(f"Attempting to start match for teams: {[team_names[i - 1] for i in team_indexes]}")
-        match(team_indexes)
+        # A player can only be in one game; later games in the round see who is already placed
+        players = room.players_for(team_indexes, taken)
+        if len(players) < 4:
+            print("Not enough players to start a match.")
+            continue
+        taken.update(players)
+        started.append(start_match(players))
 
-    return schedule_index + 1"""
+    return started
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Mahjong Soul contest matchmaking")
     sub = parser.add_subparsers(dest="cmd", required=True)
 
-    #p_round = sub.add_parser("start-round", help="Start all matches for a schedule round (0-based index)")
-    #p_round.add_argument("index", type=int)
+    p_round = sub.add_parser("start-round", help="Start every ready match of a schedule round (1-based index)")
+    p_round.add_argument("index", type=int)
+
+    p_match_id = sub.add_parser("start-match-id", help="Start the game(s) with this match_id in schedule.csv")
+    p_match_id.add_argument("match_id", type=int)
 
     p_round_match = sub.add_parser("start-match-index", help="Start a single match from schedule round and match index (1-based)")
     p_round_match.add_argument("round_index", type=int, help="Round index (1-based)")
@@ -144,9 +190,11 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    #if args.cmd == "start-round":
-        #start_scheduled_matches(args.index)
-    if args.cmd == "start-match-index":
+    if args.cmd == "start-round":
+        start_scheduled_matches(args.index)
+    elif args.cmd == "start-match-id":
+        start_match_id(args.match_id)
+    elif args.cmd == "start-match-index":
         start_match_index(args.round_index, args.match_index)
     elif args.cmd == "start-match":
         match(tuple(args.teams))
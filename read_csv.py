@@ -1,4 +1,10 @@
 import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from scheduling.schedule_store import ScheduleStore
 
 def get_teams():
     # Creates a dictionary of team name to a list of players
@@ -26,32 +32,44 @@ def get_individuals(path: str = "individuals.csv"):
 
     return individuals
 
-def get_schedule(path: str = "schedule.csv"):
+def get_schedule_store(path: str = "schedule.csv"):
     """
-    Load schedule as List[List[Tuple[seat0, seat1, seat2, seat3]]].
-    Expects headers: week, round_in_week, global_round, game, seat_0..seat_3.
-    Orders by global_round then game.
+    Indexed schedule (see scheduling.schedule_store), loaded from its binary cache when the CSV is unchanged.
+    Returns None if the file does not exist.
     """
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            rounds = {}
-            for row in reader:
-                try:
-                    gr = int(row.get("week") or 0)
-                    game_idx = int(row.get("game") or row.get("Game") or 0)
-                except ValueError:
-                    continue
-
-                seats = [int(row.get(k)) for k in ("east seat", "south seat", "west seat", "north seat")]
-
-
-                rounds.setdefault(gr, []).append((game_idx, tuple(seats)))
-
-        schedule = []
-        for gr in sorted(rounds):
-            games_sorted = [g for _, g in sorted(rounds[gr], key=lambda x: x[0])]
-            schedule.append(games_sorted)
-        return schedule
+        return ScheduleStore.load(path)
     except FileNotFoundError:
-        return []
\ No newline at end of file
+        return None
+
+def get_schedule(path: str = "schedule.csv"):
+    """
+    Load schedule as List[List[Tuple[seat0, seat1, seat2, seat3]]].
+    Expects headers: match_id, week, east seat..north seat.
+    One list per week (in week order), games in file order.
+    """
+    store = get_schedule_store(path)
+    if store is None:
+        return []
+    return [store.week_games(week) for week in store.weeks()]
+
+def get_result_games(path: str):
+    """
+    Games of a wide results CSV (export_results_csv) as tuples of 1-based team indexes,
+    the ids schedule.csv uses. Games with a player who is on no team are skipped.
+    """
+    teams, team_names = get_teams()
+    index_of = {}
+    for i, team_name in enumerate(team_names, start=1):
+        for nickname in teams[team_name]:
+            index_of.setdefault(nickname, i)
+
+    games = []
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            game = tuple(index_of.get(row.get(f"player{s}_nickname")) for s in range(1, 5))
+            if None not in game:
+                games.append(game)
+
+    return games
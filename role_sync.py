@@ -0,0 +1,103 @@
+import asyncio
+from collections import namedtuple
+
+# Team role sync for discord_bot. Planning is a pure diff over dicts built once from the
+# guild (name -> member, name -> role), so it costs O(members + players) instead of a
+# guild-wide scan per player. Only the missing (and, with prune, stale) team roles are
+# then applied, a few API calls at a time.
+#
+# Only duck typing is used: guild.members / guild.roles, member.name / member.roles,
+# await member.add_roles(role) / member.remove_roles(role), role.name. A plain fake guild
+# object works for trying it out without Discord.
+
+RoleChange = namedtuple("RoleChange", ["action", "member", "role"])
+
+DEFAULT_CONCURRENCY = 5
+
+PLANNED = {"add": "Add", "remove": "Remove"}
+DONE = {"add": "Added", "remove": "Removed"}
+
+
+def plan_role_changes(guild, teams, maj_to_disc, prune=False):
+    """
+    Returns (changes, problems). changes are the RoleChanges that make every listed player hold
+    their team's role; with prune, team roles held by anyone not on that team are removed too.
+    problems are human-readable lines for missing roles, Discord names and members.
+    """
+    members = {m.name: m for m in guild.members}
+    roles = {r.name: r for r in guild.roles}
+
+    problems = []
+    desired = {}
+    team_roles = set()
+    for team, players in teams.items():
+        role = roles.get(team)
+        if role is None:
+            problems.append(f"Role doesn't exist: {team}")
+            continue
+        team_roles.add(role)
+
+        for player in players:
+            discord_name = maj_to_disc.get(player)
+            if not discord_name:
+                problems.append(f"Discord name not found for player {player}")
+                continue
+            member = members.get(discord_name)
+            if member is None:
+                problems.append(f"Member doesn't exist: {discord_name}")
+                continue
+            desired.setdefault(member, set()).add(role)
+
+    changes = []
+    for member, wanted in desired.items():
+        held = set(member.roles)
+        changes.extend(RoleChange("add", member, role) for role in wanted - held)
+
+    if prune:
+        for member in guild.members:
+            stale = (set(member.roles) & team_roles) - desired.get(member, set())
+            changes.extend(RoleChange("remove", member, role) for role in stale)
+
+    # Stable order for reports
+    changes.sort(key=lambda c: (c.action, str(c.role.name), str(c.member.name)))
+    return changes, problems
+
+
+async def apply_role_changes(changes, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Applies changes with at most `concurrency` requests in flight (discord.py waits out 429s
+    itself; the bound keeps us from queueing a burst). Returns one result per change: None on
+    success, otherwise the exception.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def apply(change):
+        async with semaphore:
+            if change.action == "add":
+                await change.member.add_roles(change.role)
+            else:
+                await change.member.remove_roles(change.role)
+
+    results = await asyncio.gather(*(apply(c) for c in changes), return_exceptions=True)
+    return [r if isinstance(r, BaseException) else None for r in results]
+
+
+def format_report(changes, problems, results=None, dry_run=False):
+    lines = list(problems)
+    for i, change in enumerate(changes):
+        failed = results is not None and results[i] is not None
+        verb = PLANNED[change.action] if dry_run or failed else DONE[change.action]
+        preposition = "to" if change.action == "add" else "from"
+        line = f"{verb} role {change.role.name} {preposition} {change.member.name}"
+        lines.append(f"FAILED: {line} ({results[i]})" if failed else line)
+    failed = sum(1 for r in results or [] if r is not None)
+    summary = f"{len(changes)} role changes" + (" (dry run)" if dry_run else f", {failed} failed")
+    lines.append(summary if changes else "Roles already in sync.")
+    return "\n".join(lines)
+
+
+async def sync_roles(guild, teams, maj_to_disc, prune=False, dry_run=False, concurrency=DEFAULT_CONCURRENCY):
+    # Plans, applies (unless dry_run) and returns the report text
+    changes, problems = plan_role_changes(guild, teams, maj_to_disc, prune=prune)
+    results = None if dry_run else await apply_role_changes(changes, concurrency)
+    return format_report(changes, problems, results, dry_run=dry_run)
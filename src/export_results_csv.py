@@ -1,57 +1,232 @@
-import csv
+import json
 import os
-from utils.api import fetch_results_csv
+from itertools import chain
+from utils.api import RECORDS_PAGE_SIZE, fetch_records_page, iter_game_records
+from utils.result_writers import LAYOUTS, WRITERS
 from utils.helpers import get_env, is_running_in_github_actions
+from utils.instrument import count, profile_main, timed, timer
+
+# Incremental runs keep a state file next to the outputs:
+#   version   - STATE_VERSION; state written by an older layout means a full rebuild
+#   count     - total records the API reported last time
+#   uuids     - uuids of every exported game. A game is new if its uuid is not here, whatever
+#               its end_time: games do not finish in the order the API lists them
+#   end_time  - latest end_time among exported games without a uuid (only those are told apart by time)
+#   outputs   - the files it describes; asking for a different set of outputs means a full rebuild
+#   standings_games - games in the standings totals (.standings.npz), when standings are kept
+# A run that sees the same count writes nothing, so `aws s3 sync` has nothing to upload.
+
+STATE_VERSION = 2
+
+class Output:
+    # One exported file: a writer plus how each game becomes rows
+    def __init__(self, base, fmt, layout="wide", typed=False):
+        writer_cls = WRITERS[fmt]
+        self.fmt, self.layout = fmt, layout
+        columns, self.to_rows = LAYOUTS[layout]
+        self.typed = typed or writer_cls.typed_only
+        self.writer = writer_cls(f"{base}.{writer_cls.extension}", columns)
+
+    def write_games(self, games):
+        with timed("export_write", format=self.fmt, layout=self.layout):
+            self.writer.write_rows(row for game in games for row in self.to_rows(game, self.typed))
+
+def output_paths(outputs):
+    return sorted(o.writer.path for o in outputs)
+
+def state_path(base):
+    return f"{base}.state.json"
+
+def load_state(base, outputs):
+    # No usable state (or a missing output to add to) means a full rebuild
+    if not all(os.path.exists(o.writer.path) for o in outputs):
+        return None
+    try:
+        with open(state_path(base), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("version") != STATE_VERSION:
+        return None
+    return state if sorted(state["outputs"]) == output_paths(outputs) else None
+
+def save_state(base, state):
+    tmp = f"{state_path(base)}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, state_path(base))
+
+def advance_state(state, game):
+    # Records one exported game in the state (in place)
+    if game.get('uuid') is not None:
+        state["uuids"].append(game['uuid'])
+    elif state["end_time"] is None or game['end_time'] > state["end_time"]:
+        state["end_time"] = game['end_time']
+
+def is_new(game, state, exported):
+    # exported: set(state["uuids"])
+    if game.get('uuid') is not None:
+        return game['uuid'] not in exported
+    return state["end_time"] is None or game['end_time'] > state["end_time"]
+
+def newer_records(state, verbose=False):
+    """
+    Returns (records not exported yet in API order, API total, whether the API lists newest
+    first). Only the pages that can hold new games are fetched: the API adds games at one end
+    of its list, so those are the pages past the `count` games seen last time.
+    """
+    first = fetch_records_page(0, verbose=verbose)
+    total = first.get("total")
+    records = first["record_list"]
+    if total is not None and total == state["count"]:
+        return [], total, False
+
+    newest_first = len(records) > 1 and records[0]['end_time'] > records[-1]['end_time']
+    if total is None:
+        source = chain(records, iter_game_records(start=RECORDS_PAGE_SIZE, verbose=verbose))
+    elif newest_first:
+        # New games are at the front; one page of slack covers games that finished during the fetch
+        stop = total - state["count"] + RECORDS_PAGE_SIZE
+        source = chain(records, iter_game_records(start=RECORDS_PAGE_SIZE, stop=stop, verbose=verbose))
+    else:
+        source = iter_game_records(start=max(state["count"] - RECORDS_PAGE_SIZE, 0), verbose=verbose)
+
+    exported = set(state["uuids"])
+    new, seen = [], set()
+    for game in source:
+        key = game.get('uuid')
+        if is_new(game, state, exported) and (key is None or key not in seen):
+            seen.add(key)
+            new.append(game)
+    return new, total, newest_first
+
+def write_full(outputs, games, standings=None):
+    # Streams every record into each output's temp file, a page at a time, then swaps them in. Returns the new state.
+    state = {"version": STATE_VERSION, "count": 0, "uuids": [], "end_time": None, "outputs": output_paths(outputs)}
+    batch = []
+
+    def flush():
+        for o in outputs:
+            o.write_games(batch)
+        if standings is not None:
+            with timed("standings_update"):
+                standings.add_records(batch)
+        count("export_games", len(batch), mode="full")
+
+    for o in outputs:
+        o.writer.begin()
+    for game in games:
+        batch.append(game)
+        advance_state(state, game)
+        state["count"] += 1
+        if len(batch) >= RECORDS_PAGE_SIZE:
+            flush()
+            batch = []
+    flush()
+    for o in outputs:
+        o.writer.commit()
+    return state
+
+def load_standings(base, state):
+    # Standings totals matching the state, or None (then everything is rebuilt)
+    from standings import Standings
+    path = f"{base}.standings.npz"
+    if state is None or not os.path.exists(path):
+        return None
+    standings = Standings.load(path)
+    return standings if standings.num_games == state.get("standings_games") else None
+
+def publish_standings(standings, state, base, csv_output_dir, mjs_season_id):
+    from standings import write_standings
+    from read_csv import get_teams
+    teams, _ = get_teams()
+    standings.save(f"{base}.standings.npz")
+    write_standings(standings, teams, f"{csv_output_dir}/standings_season_{mjs_season_id}")
+    state["standings_games"] = standings.num_games
+
+def write_incremental(outputs, games, newest_first):
+    # New rows go where a full rebuild would put them: first if the API lists newest first
+    for o in outputs:
+        o.writer.begin()
+        if newest_first:
+            o.write_games(games)
+        o.writer.copy_existing()
+        if not newest_first:
+            o.write_games(games)
+        o.writer.commit()
+
+@timer("export_run")
+def export_results_csv(full=False, formats=("csv",), layout="wide", typed=False, standings=False):
+    # Writes results to CSV (and/or JSONL, Parquet), and optionally standings. Used by GitHub Action.
+    verbose = is_running_in_github_actions()
 
-def export_results_csv():
-    # Writes results to a CSV file. Used by GitHub Action.
-    contest_data = fetch_results_csv(verbose=is_running_in_github_actions())
-    
     csv_output_dir = get_env('CSV_OUTPUT_DIR', 'output')
     mjs_season_id = get_env('MJS_SEASON_ID', 1)
 
     if not os.path.exists(csv_output_dir):
         os.mkdir(csv_output_dir)
 
-    # Output CSV filename
-    csv_file = f"{csv_output_dir}/results_season_{mjs_season_id}.csv"
-
-    # Define CSV column headers
-    headers = [
-        "start_time", "end_time", "tag",
-        "player1_nickname", "player1_part_point", "player1_total_point",
-        "player2_nickname", "player2_part_point", "player2_total_point",
-        "player3_nickname", "player3_part_point", "player3_total_point",
-        "player4_nickname", "player4_part_point", "player4_total_point"
-    ]
-
-    with open(csv_file, mode='w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-
-        for game in contest_data:
-            row = [
-                game['start_time'],
-                game['end_time'],
-                game['tag']
-            ]
-
-            # Create a dict of players by seat for quick lookup
-            player_data = {p['seat']: p for p in game['result']['players']}
-            nickname_data = {a['seat']: a['nickname'] for a in game['accounts']}
-
-            # Append data for seats 0 through 3
-            for seat in range(4):
-                nickname = nickname_data.get(seat, "")
-                if not nickname:
-                    nickname = "computer"
-                part_point = player_data.get(seat, {}).get('part_point_1', "")
-                total_point = player_data.get(seat, {}).get('total_point', "")
-                row.extend([nickname, part_point, total_point])
-
-            writer.writerow(row)
-
-    print(f"Data exported to {csv_file}")
+    # Output filenames: results_season_N[_long].<format>, one state file per layout
+    base = f"{csv_output_dir}/results_season_{mjs_season_id}"
+    if layout != "wide":
+        base = f"{base}_{layout}"
+    outputs = [Output(base, fmt, layout, typed) for fmt in formats]
+    names = ", ".join(o.writer.path for o in outputs)
+
+    state = None if full else load_state(base, outputs)
+    totals = None
+    if standings:
+        totals = load_standings(base, state)
+        if totals is None:
+            state = None
+
+    if state is None:
+        # Records are streamed page by page and written as they arrive
+        if standings:
+            # Standings need NumPy, which the plain CSV export does not
+            from standings import Standings
+            totals = Standings()
+        state = write_full(outputs, iter_game_records(verbose=verbose), totals)
+        if totals is not None:
+            publish_standings(totals, state, base, csv_output_dir, mjs_season_id)
+        save_state(base, state)
+        print(f"Data exported to {names} ({state['count']} games)")
+        return
+
+    games, total, newest_first = newer_records(state, verbose=verbose)
+    if not games:
+        if total is not None and total != state["count"]:
+            save_state(base, {**state, "count": total})
+        print(f"No new games; {names} left unchanged")
+        return
+
+    write_incremental(outputs, games, newest_first)
+    count("export_games", len(games), mode="incremental")
+    for game in games:
+        advance_state(state, game)
+    state["count"] = total if total is not None else state["count"] + len(games)
+    if totals is not None:
+        with timed("standings_update"):
+            totals.add_records(games)
+        publish_standings(totals, state, base, csv_output_dir, mjs_season_id)
+    else:
+        # Standings totals (if any) no longer cover every game
+        state.pop("standings_games", None)
+    save_state(base, state)
+    print(f"Added {len(games)} new games to {names}")
 
 if __name__ == "__main__":
-    export_results_csv()
+    import argparse
+    parser = argparse.ArgumentParser(description="Export contest results to CSV")
+    parser.add_argument("--full", action="store_true", help="Refetch everything and rebuild the outputs")
+    parser.add_argument("--format", dest="formats", action="append", choices=sorted(WRITERS),
+                        help="Output format, may be repeated (default: csv)")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="wide",
+                        help="wide: one row per game; long: one row per seat")
+    parser.add_argument("--typed", action="store_true",
+                        help="Write points as integers (always on for parquet)")
+    parser.add_argument("--standings", action="store_true",
+                        help="Also keep player/team standings (standings_season_N_players.csv, _teams.csv, _head_to_head.csv)")
+    args = parser.parse_args()
+    profile_main(export_results_csv, full=args.full, formats=list(dict.fromkeys(args.formats or ["csv"])),
+                 layout=args.layout, typed=args.typed, standings=args.standings)
@@ -1,107 +1,121 @@
 import random
-import itertools
-from collections import Counter, defaultdict
-import pandas as pd
-
-random.seed(2)
-
-# Constants
+from itertools import combinations
+import numpy as np
+from scheduling.pair_counts import PairCounts
+from scheduling.schedule_io import write_schedule_csv
+from scheduling.seating import SeatCounts, seat_round
+
+# Default configuration
+SEED = 2
 NUM_PLAYERS = 11
 GAMES_PER_WEEK = 11
 WEEKS = 6
 GAMES_PER_PLAYER_PER_WEEK = 4
 PLAYERS_PER_GAME = 4
-SEATS = ["east seat", "south seat", "west seat", "north seat"]
-
-# Player list
-players = list(range(1, NUM_PLAYERS + 1))
-
-# Track total pairings
-pairings = Counter()
-
-# Track seat usage per player
-seat_counts = {player: {seat: 0 for seat in SEATS} for player in players}
-
-# Store final matches
-matches = []
-
-match_id = 1
-
-# Helper to get all 2-player combinations from a group
-def get_pairings(group):
-    return list(itertools.combinations(sorted(group), 2))
-
-# Assign seats to 4 players in a balanced way
-def assign_balanced_seats(group):
-    best_perm = None
-    best_score = float("inf")
-    
-    for perm in itertools.permutations(group):
-        score = sum(seat_counts[player][seat] for player, seat in zip(perm, SEATS))
-        if score < best_score:
-            best_score = score
-            best_perm = perm
-    
-    # Update seat counts
-    for player, seat in zip(best_perm, SEATS):
-        seat_counts[player][seat] += 1
-    
-    return best_perm
-
-# Generate matches week by week
-for week in range(1, WEEKS + 1):
-    weekly_matches = []
-    player_game_counts = Counter()
-    
-    attempts = 0
-    while len(weekly_matches) < GAMES_PER_WEEK:
-        attempts += 1
-        if attempts > 10000:
-            raise Exception("Stuck in loop. Possibly over-constrained.")
-        
-        # Eligible players (less than 4 games this week)
-        eligible_players = [p for p in players if player_game_counts[p] < GAMES_PER_PLAYER_PER_WEEK]
-        if len(eligible_players) < PLAYERS_PER_GAME:
-            continue
-
-        group = random.sample(eligible_players, PLAYERS_PER_GAME)
-        group_pairings = get_pairings(group)
-        score = sum(pairings[pair] for pair in group_pairings)
-
-        # Try several groupings and pick best one
-        best_group = group
-        best_score = score
-        for _ in range(20):
-            candidate_group = random.sample(eligible_players, PLAYERS_PER_GAME)
-            candidate_score = sum(pairings[pair] for pair in get_pairings(candidate_group))
-            if candidate_score < best_score:
-                best_score = candidate_score
-                best_group = candidate_group
-
-        # Assign seats in balanced way
-        east, south, west, north = assign_balanced_seats(best_group)
-
-        # Update player game counts and pairings
-        for p in [east, south, west, north]:
-            player_game_counts[p] += 1
-        for pair in get_pairings([east, south, west, north]):
-            pairings[pair] += 1
-
-        # Save match
-        weekly_matches.append({
-            "match_id": match_id,
-            "week": week,
-            "east seat": east,
-            "south seat": south,
-            "west seat": west,
-            "north seat": north
-        })
-        match_id += 1
-
-    matches.extend(weekly_matches)
-
-# Create DataFrame and save to CSV
-df = pd.DataFrame(matches)
-df.to_csv("mahjong_schedule_balanced_seats.csv", index=False)
-print("Schedule saved to mahjong_schedule_balanced_seats.csv")
-
+OUTPUT = "mahjong_schedule_balanced_seats.csv"
+
+# How a week stays feasible:
+# with `games_left` games to fill and quota[p] games still allowed for player p, the games can be
+# filled iff sum(min(quota[p], games_left)) >= PLAYERS_PER_GAME * games_left (nobody plays twice
+# in one game, so a player can cover at most games_left seats). Candidate groups that would break
+# this are dropped before choosing, so the engine never walks into a dead end and never has to
+# back out of a choice.
+
+def week_capacity(quota, games_left):
+    return int(np.minimum(quota, games_left).sum())
+
+class WeekScheduler:
+    """
+    Schedules one game at a time with a per-week cap on games per player. Games within a week
+    are sequential (one match_id per game), unlike league_scheduling's simultaneous rounds.
+    """
+
+    def __init__(self, num_players=NUM_PLAYERS, games_per_week=GAMES_PER_WEEK, weeks=WEEKS,
+                 games_per_player_per_week=GAMES_PER_PLAYER_PER_WEEK, seed=SEED):
+        self.num_players = num_players
+        self.games_per_week = games_per_week
+        self.weeks = weeks
+        self.games_per_player_per_week = games_per_player_per_week
+        self.seed = seed
+
+        # Every possible group, as player ids, and the column pairs inside a group
+        self.groups = np.array(list(combinations(range(1, num_players + 1), PLAYERS_PER_GAME)), dtype=np.intp)
+        self.group_pairs = list(combinations(range(PLAYERS_PER_GAME), 2))
+
+    def pick_group(self, quota, games_left, pairings, rng):
+        """
+        Lowest pair-cost group among players with quota left whose choice keeps the rest of the
+        week feasible. Ties are broken with rng, so a seed gives a fixed schedule.
+        """
+        idx = self.groups - 1
+        q = quota[idx]  # (groups, 4) quota left for each member
+        left = games_left - 1
+        capacity_after = week_capacity(quota, left) + (np.minimum(q - 1, left) - np.minimum(q, left)).sum(axis=1)
+        allowed = (q > 0).all(axis=1) & (capacity_after >= PLAYERS_PER_GAME * left)
+
+        candidates = np.flatnonzero(allowed)
+        if len(candidates) == 0:
+            raise ValueError("No group keeps this week feasible.")
+
+        # Cost of each candidate group = sum of its pair counts, one gather over the pair matrix
+        m = pairings.matrix()
+        cost = sum(m[idx[candidates, a], idx[candidates, b]] for a, b in self.group_pairs)
+        best = candidates[cost == cost.min()]
+        return [int(p) for p in self.groups[rng.choice(list(best))]]
+
+    def schedule_week(self, pairings, seat_counts, rng):
+        quota = np.full(self.num_players, self.games_per_player_per_week)
+        if week_capacity(quota, self.games_per_week) < PLAYERS_PER_GAME * self.games_per_week:
+            raise ValueError(
+                f"Cannot fill {self.games_per_week} games with {self.num_players} players playing at most "
+                f"{self.games_per_player_per_week} games per week."
+            )
+
+        weekly_games = []
+        for games_left in range(self.games_per_week, 0, -1):
+            group = self.pick_group(quota, games_left, pairings, rng)
+
+            # Assign seats in balanced way (also updates seat counts)
+            weekly_games.append(seat_round([group], seat_counts)[0])
+
+            # Update player game counts and pairings
+            quota[np.array(group) - 1] -= 1
+            pairings.add_game(group)
+
+        return weekly_games
+
+    def create_schedule(self):
+        """
+        Returns (schedule, weeks) in the same shape as league_scheduling: a list of rounds
+        (here one game each) and the week of each round.
+        """
+        rng = random.Random(self.seed)
+        pairings = PairCounts(self.num_players)
+        seat_counts = SeatCounts(self.num_players)
+
+        # Generate matches week by week
+        schedule, weeks = [], []
+        for week in range(1, self.weeks + 1):
+            for game in self.schedule_week(pairings, seat_counts, rng):
+                schedule.append([game])
+                weeks.append(week)
+        return schedule, weeks
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Schedule games with a per-week cap on games per player")
+    parser.add_argument("--players", type=int, default=NUM_PLAYERS)
+    parser.add_argument("--games-per-week", type=int, default=GAMES_PER_WEEK)
+    parser.add_argument("--weeks", type=int, default=WEEKS)
+    parser.add_argument("--games-per-player", type=int, default=GAMES_PER_PLAYER_PER_WEEK, help="Games per player per week")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", default=OUTPUT)
+    args = parser.parse_args(argv)
+
+    scheduler = WeekScheduler(args.players, args.games_per_week, args.weeks, args.games_per_player, args.seed)
+    schedule, weeks = scheduler.create_schedule()
+    write_schedule_csv(schedule, weeks, args.output)
+    print(f"Schedule saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from scheduling.metrics import schedule_metrics, metrics_key
+from scheduling.pair_counts import PairCounts
+from scheduling.schedule_store import ScheduleStore
+from scheduling.seating import SeatCounts
+
+# Whole-schedule statistics as plain dicts/lists (JSON-ready), computed from the (G, 4) seat
+# array of a schedule plus each game's round and week. Nothing is printed here.
+#
+# Rest gaps are counted in rounds: a player in rounds 3 and 4 has a gap of 0 (back to back),
+# one in rounds 3 and 6 has a gap of 2.
+
+
+def rest_gaps(games, rounds):
+    """
+    (player of each gap, gap) arrays: for every player, the rounds sat out between consecutive games.
+    """
+    players = games.ravel()
+    played = np.repeat(rounds, 4)
+    order = np.lexsort((played, players))
+    players, played = players[order], played[order]
+    same = players[1:] == players[:-1]
+    return players[1:][same], (played[1:] - played[:-1] - 1)[same]
+
+
+def analyze_games(games, rounds, weeks, num_players=None):
+    """
+    Report for a schedule given as a (G, 4) int array of seat-ordered player ids (1-based)
+    with the round and week of each game. num_players only sizes the per-id lists and
+    matrices; statistics cover the players that appear in games.
+    """
+    games = np.asarray(games, dtype=np.intp).reshape(-1, 4)
+    rounds = np.asarray(rounds, dtype=np.intp)
+    weeks = np.asarray(weeks, dtype=np.intp)
+    n = max(num_players or 0, int(games.max()) if games.size else 0)
+    # Ids that never play (a --players larger than the schedule, dropped players) would
+    # otherwise count as players who met nobody
+    players = np.unique(games)
+
+    pair_counts = PairCounts(n)
+    seat_counts = SeatCounts(n)
+    pair_counts.add_games(games)
+    seat_counts.add_games(games)
+
+    games_per_player = np.bincount(games.ravel(), minlength=n + 1)[1:]
+    week_ids = np.unique(weeks)
+    per_week = np.zeros((len(week_ids), n + 1), dtype=np.int64)
+    np.add.at(per_week, (np.repeat(np.searchsorted(week_ids, weeks), 4), games.ravel()), 1)
+    per_week = per_week[:, 1:]
+
+    gap_player, gap = rest_gaps(games, rounds)
+    back_to_back = np.bincount(gap_player[gap == 0], minlength=n + 1)[1:]
+    gap_values, gap_counts = np.unique(gap, return_counts=True)
+
+    active = per_week[:, players - 1]
+
+    return {
+        "num_players": n,
+        "players": players.tolist(),
+        "games": len(games),
+        "rounds": len(np.unique(rounds)),
+        "weeks": [int(w) for w in week_ids],
+        "metrics": schedule_metrics(pair_counts, seat_counts, players),
+        "games_per_player": games_per_player.tolist(),
+        "games_per_week": per_week.tolist(),
+        "games_per_week_spread": int((active.max(axis=1) - active.min(axis=1)).max()) if active.size else 0,
+        "pair_matrix": pair_counts.matrix().tolist(),
+        "seat_matrix": seat_counts.matrix().tolist(),
+        "rest": {
+            "back_to_back": int(back_to_back.sum()),
+            "back_to_back_per_player": back_to_back.tolist(),
+            "mean_gap": float(gap.mean()) if gap.size else 0.0,
+            "max_gap": int(gap.max()) if gap.size else 0,
+            "gap_histogram": {int(v): int(c) for v, c in zip(gap_values, gap_counts)},
+        },
+    }
+
+
+def analyze_schedule(path, num_players=None):
+    # Report for a schedule CSV (no sidecar cache, so batches of candidates leave no files behind)
+    store = ScheduleStore.from_csv(path)
+    report = analyze_games(store.seats, store.round, store.week, num_players)
+    report["path"] = path
+    return report
+
+
+def summary(report):
+    # The scalar part of a report, for ranking many schedules
+    return {
+        "path": report.get("path"),
+        **report["metrics"],
+        "games_per_week_spread": report["games_per_week_spread"],
+        "back_to_back": report["rest"]["back_to_back"],
+        "max_gap": report["rest"]["max_gap"],
+    }
+
+
+def _summarize_path(args):
+    path, num_players = args
+    return summary(analyze_schedule(path, num_players))
+
+
+def score_schedules(paths, num_players=None, workers=None):
+    """
+    Summaries of many schedule CSVs, best first (matchup std, then seat std, then fewest
+    back-to-back games). Large batches are spread over worker processes.
+    """
+    jobs = [(path, num_players) for path in paths]
+    if workers == 1 or len(jobs) < 32:
+        results = [_summarize_path(job) for job in jobs]
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_summarize_path, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+    return sorted(results, key=lambda s: (*metrics_key(s), s["back_to_back"]))
@@ -0,0 +1,235 @@
+import math
+import random
+import time
+from collections import Counter
+
+from scheduling.metrics import schedule_metrics, print_schedule_metrics
+from scheduling.pair_counts import PairCounts
+from scheduling.seating import SeatCounts
+
+# Simulated annealing post-pass for finished schedules.
+#
+# Objective: pair_weight * sum(pair_count^2) + seat_weight * sum(seat_count^2).
+# The totals of both are fixed by the schedule shape, so lowering the sums of
+# squares lowers the matchup and seat standard deviations.
+#
+# Moves never change which rounds/weeks a player is in, so games per player and
+# per-week counts stay exactly as they were:
+#   - swap two players between two games of the same block (round, or week)
+#   - swap the seats of two players within one game
+
+
+def _blocks(schedule, weeks, scope):
+    # Groups of (round, game) positions that players may be swapped between
+    blocks = {}
+    for r, round_games in enumerate(schedule):
+        key = r if scope == "round" else weeks[r]
+        blocks.setdefault(key, []).extend((r, g) for g in range(len(round_games)))
+    return [b for b in blocks.values() if len(b) >= 2]
+
+
+def _week_counts(schedule, weeks):
+    return Counter((weeks[r], p) for r, round_games in enumerate(schedule) for game in round_games for p in game)
+
+
+class Annealer:
+    def __init__(self, schedule, weeks, num_players=None, scope="round", pair_weight=1.0, seat_weight=0.5, seed=0):
+        if scope not in ("round", "week"):
+            raise ValueError("scope must be 'round' or 'week'.")
+
+        self.schedule = [[list(game) for game in round_games] for round_games in schedule]
+        self.weeks = list(weeks)
+        self.num_players = num_players or max(p for round_games in schedule for game in round_games for p in game)
+        self.pair_weight = pair_weight
+        self.seat_weight = seat_weight
+        self.rng = random.Random(seed)
+        self.blocks = _blocks(self.schedule, self.weeks, scope)
+
+        # Plain nested lists: the hot loop does scalar reads, which lists do faster than NumPy
+        n = self.num_players + 1
+        self.pairs = [[0] * n for _ in range(n)]
+        self.seats = [[0] * 4 for _ in range(n)]
+        self.round_players = [set() for _ in self.schedule]
+        for r, round_games in enumerate(self.schedule):
+            for game in round_games:
+                self.round_players[r].update(game)
+                for s, p in enumerate(game):
+                    self.seats[p][s] += 1
+                    for q in game[s + 1:]:
+                        self.pairs[p][q] += 1
+                        self.pairs[q][p] += 1
+
+        self.cost = self.pair_weight * sum(c * c for i, row in enumerate(self.pairs) for c in row[i + 1:])
+        self.cost += self.seat_weight * sum(c * c for row in self.seats for c in row)
+
+    def _seat_delta(self, x, i, j):
+        # Player x moves from seat i to seat j
+        if i == j:
+            return 0
+        row = self.seats[x]
+        return 2 * (row[j] - row[i] + 1)
+
+    def swap_players_delta(self, r1, g1, i, r2, g2, j):
+        """
+        Cost change from exchanging player at seat i of game (r1, g1) with the player at seat j
+        of game (r2, g2); each takes the other's seat. None if the move is not allowed.
+        """
+        game1, game2 = self.schedule[r1][g1], self.schedule[r2][g2]
+        x, y = game1[i], game2[j]
+        if x in game2 or y in game1:
+            return None
+        if r1 != r2 and (x in self.round_players[r2] or y in self.round_players[r1]):
+            return None
+
+        # Games in the same week can share other players, so merge the pair changes first
+        changes = Counter()
+        for o in game1:
+            if o != x:
+                changes[(x, o)] -= 1
+                changes[(y, o)] += 1
+        for o in game2:
+            if o != y:
+                changes[(y, o)] -= 1
+                changes[(x, o)] += 1
+
+        pairs = self.pairs
+        pair_delta = sum(2 * d * pairs[a][b] + d * d for (a, b), d in changes.items() if d)
+        seat_delta = self._seat_delta(x, i, j) + self._seat_delta(y, j, i)
+        return self.pair_weight * pair_delta + self.seat_weight * seat_delta
+
+    def swap_players(self, r1, g1, i, r2, g2, j):
+        game1, game2 = self.schedule[r1][g1], self.schedule[r2][g2]
+        x, y = game1[i], game2[j]
+        for o in game1:
+            if o != x:
+                self._add_pair(x, o, -1)
+                self._add_pair(y, o, 1)
+        for o in game2:
+            if o != y:
+                self._add_pair(y, o, -1)
+                self._add_pair(x, o, 1)
+        self.seats[x][i] -= 1
+        self.seats[x][j] += 1
+        self.seats[y][j] -= 1
+        self.seats[y][i] += 1
+        game1[i], game2[j] = y, x
+        if r1 != r2:
+            self.round_players[r1].discard(x)
+            self.round_players[r1].add(y)
+            self.round_players[r2].discard(y)
+            self.round_players[r2].add(x)
+
+    def swap_seats_delta(self, r, g, i, j):
+        game = self.schedule[r][g]
+        return self.seat_weight * (self._seat_delta(game[i], i, j) + self._seat_delta(game[j], j, i))
+
+    def swap_seats(self, r, g, i, j):
+        game = self.schedule[r][g]
+        x, y = game[i], game[j]
+        self.seats[x][i] -= 1
+        self.seats[x][j] += 1
+        self.seats[y][j] -= 1
+        self.seats[y][i] += 1
+        game[i], game[j] = y, x
+
+    def _add_pair(self, a, b, d):
+        self.pairs[a][b] += d
+        self.pairs[b][a] += d
+
+    def random_move(self):
+        # Returns (delta, apply) for a random allowed move, or None if the draw was not allowed
+        rng = self.rng
+        if self.blocks and rng.random() < 0.75:
+            block = rng.choice(self.blocks)
+            (r1, g1), (r2, g2) = rng.sample(block, 2)
+            i, j = rng.randrange(4), rng.randrange(4)
+            delta = self.swap_players_delta(r1, g1, i, r2, g2, j)
+            if delta is None:
+                return None
+            return delta, lambda: self.swap_players(r1, g1, i, r2, g2, j)
+
+        r = rng.randrange(len(self.schedule))
+        g = rng.randrange(len(self.schedule[r]))
+        i, j = rng.sample(range(4), 2)
+        return self.swap_seats_delta(r, g, i, j), lambda: self.swap_seats(r, g, i, j)
+
+    def initial_temperature(self, samples=200):
+        # Average uphill move, so early on most uphill moves are accepted
+        uphill = []
+        for _ in range(samples):
+            move = self.random_move()
+            if move and move[0] > 0:
+                uphill.append(move[0])
+        return sum(uphill) / len(uphill) if uphill else 1.0
+
+    def metrics(self, schedule=None):
+        schedule = schedule if schedule is not None else self.schedule
+        games = [game for round_games in schedule for game in round_games]
+        pair_counts = PairCounts(self.num_players)
+        seat_counts = SeatCounts(self.num_players)
+        pair_counts.add_games(games)
+        seat_counts.add_games(games)
+        players = sorted({p for round_games in schedule for game in round_games for p in game})
+        return schedule_metrics(pair_counts, seat_counts, players)
+
+    def run(self, budget=10.0, final_temperature_ratio=1e-3, report_every=2.0, verbose=True):
+        """
+        Anneals for `budget` seconds, cooling geometrically from an automatic starting
+        temperature. Returns the best schedule seen (list of rounds of seat-ordered tuples).
+        """
+        before = _week_counts(self.schedule, self.weeks)
+        t0 = self.initial_temperature()
+        t_end = t0 * final_temperature_ratio
+
+        best_cost = self.cost
+        best_schedule = [[tuple(game) for game in round_games] for round_games in self.schedule]
+
+        start = time.monotonic()
+        next_report = start + report_every
+        temperature = t0
+        iterations = accepted = 0
+
+        while True:
+            iterations += 1
+            if iterations % 1000 == 0:
+                now = time.monotonic()
+                progress = (now - start) / budget if budget > 0 else 1.0
+                if progress >= 1.0:
+                    break
+                temperature = t0 * (t_end / t0) ** progress
+                if verbose and now >= next_report:
+                    next_report = now + report_every
+                    print(f"{now - start:6.1f}s iter {iterations} T={temperature:.3f} accepted {accepted} cost {self.cost:.1f} best {best_cost:.1f}")
+
+            move = self.random_move()
+            if move is None:
+                continue
+            delta, apply = move
+            if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+                apply()
+                self.cost += delta
+                accepted += 1
+                if self.cost < best_cost - 1e-9:
+                    best_cost = self.cost
+                    best_schedule = [[tuple(game) for game in round_games] for round_games in self.schedule]
+
+        if _week_counts(best_schedule, self.weeks) != before:
+            raise RuntimeError("Annealing changed per-week game counts; this is a bug.")
+
+        if verbose:
+            print(f"Annealing done: {iterations} iterations, {accepted} accepted, best cost {best_cost:.1f}")
+        return best_schedule
+
+
+def improve_schedule(schedule, weeks, num_players=None, budget=10.0, scope="round", seed=0, verbose=True):
+    # Convenience wrapper: anneal and print the before/after analysis
+    annealer = Annealer(schedule, weeks, num_players=num_players, scope=scope, seed=seed)
+    if verbose:
+        print("Before:")
+        print_schedule_metrics(annealer.metrics())
+    improved = annealer.run(budget=budget, verbose=verbose)
+    metrics = annealer.metrics(improved)
+    if verbose:
+        print("After:")
+        print_schedule_metrics(metrics)
+    return improved, metrics
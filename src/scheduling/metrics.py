@@ -0,0 +1,35 @@
+import numpy as np
+
+# Summary numbers printed by league_scheduling.analyze_schedule, as a dict so
+# schedules can be compared.
+
+
+def schedule_metrics(pair_counts, seat_counts, players):
+    # Pairs and seats of `players` only: after a reschedule the count matrices also hold
+    # dropped players, whose pairs with newcomers are always 0
+    matrix = pair_counts.matrix(players)
+    pairs = matrix[np.triu_indices(len(matrix), 1)]
+    overall_seat_counts = seat_counts.matrix(players)
+    return {
+        "matchup_std": float(pairs.std()),
+        "matchup_max": int(pairs.max()),
+        "matchup_min": int(pairs.min()),
+        "seat_std": float(overall_seat_counts.std()),
+        "seat_max": int(overall_seat_counts.max()),
+        "seat_min": int(overall_seat_counts.min()),
+    }
+
+
+def metrics_key(metrics):
+    # Lower is better: matchup variety first, seat balance second
+    return (metrics["matchup_std"], metrics["seat_std"])
+
+
+def print_schedule_metrics(metrics):
+    print("Best schedule analysis:")
+    print(f"Standard deviation of matchup distribution: {metrics['matchup_std']:.4f}")
+    print(f"Highest matchup count: {metrics['matchup_max']}")
+    print(f"Lowest matchup count: {metrics['matchup_min']}")
+    print(f"Standard deviation of seat distribution (overall): {metrics['seat_std']:.4f}")
+    print(f"Highest seat count: {metrics['seat_max']}")
+    print(f"Lowest seat count: {metrics['seat_min']}")
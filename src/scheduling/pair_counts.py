@@ -0,0 +1,73 @@
+from itertools import combinations
+import numpy as np
+
+# Column pairs of a 4-player game, in combinations() order
+GAME_PAIRS = np.array(list(combinations(range(4), 2)), dtype=np.intp)
+
+
+class PairCounts:
+    """
+    How many games each pair of players has shared, for player ids 1..num_players.
+
+    Counts live in one int16 array holding the upper triangle (pair (a, b) with a < b),
+    and `index[a, b]` maps either ordering of a pair to its slot, so lookups and
+    updates never hash tuples. Stats read the array directly without copying.
+    """
+
+    def __init__(self, num_players, dtype=np.int16):
+        self.num_players = num_players
+        self.counts = np.zeros(num_players * (num_players - 1) // 2, dtype=dtype)
+
+        # Row/column 0 is unused so player ids can index directly. Diagonal is -1.
+        a, b = np.triu_indices(num_players, 1)
+        self.index = np.full((num_players + 1, num_players + 1), -1, dtype=np.intp)
+        self.index[a + 1, b + 1] = np.arange(len(a))
+        self.index[b + 1, a + 1] = np.arange(len(a))
+
+    def __getitem__(self, pair):
+        a, b = pair
+        return int(self.counts[self.index[a, b]])
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __repr__(self):
+        return f"PairCounts(num_players={self.num_players}, min={self.min()}, max={self.max()}, std={self.std():.4f})"
+
+    def values(self):
+        # View of the counts, one entry per pair
+        return self.counts
+
+    def add_game(self, game, count=1):
+        # Slots within one game are distinct, so a plain fancy-index add is safe
+        g = np.asarray(game, dtype=np.intp)
+        self.counts[self.index[g[GAME_PAIRS[:, 0]], g[GAME_PAIRS[:, 1]]]] += count
+
+    def add_games(self, games, count=1):
+        # games is a (G, 4) array; the same pair can repeat across games
+        g = np.asarray(games, dtype=np.intp).reshape(-1, 4)
+        slots = self.index[g[:, GAME_PAIRS[:, 0]], g[:, GAME_PAIRS[:, 1]]]
+        np.add.at(self.counts, slots.ravel(), count)
+
+    def group_cost(self, group):
+        # Sum of pair counts over all pairs in the group
+        g = np.asarray(group, dtype=np.intp)
+        a, b = np.triu_indices(len(g), 1)
+        return int(self.counts[self.index[g[a], g[b]]].sum())
+
+    def matrix(self, players=None):
+        # Symmetric matrix of counts between the given players (all players by default), zero diagonal
+        if players is None:
+            players = range(1, self.num_players + 1)
+        p = np.asarray(players, dtype=np.intp)
+        slots = self.index[np.ix_(p, p)]
+        return np.where(slots >= 0, self.counts[slots], 0).astype(np.int64)
+
+    def std(self):
+        return float(self.counts.std())
+
+    def min(self):
+        return int(self.counts.min())
+
+    def max(self):
+        return int(self.counts.max())
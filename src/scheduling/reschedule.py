@@ -0,0 +1,24 @@
+from collections import Counter
+
+# Mid-season rescheduling helpers. Played games are given as tuples of schedule ids (team
+# indexes for schedule.csv) in any seat order; they are matched against the scheduled games
+# to find how much of the season is already fixed.
+
+
+def played_cutoff(schedule, played_games):
+    """
+    Number of leading rounds of schedule to keep, and how many played games matched nothing.
+
+    Rounds are kept up to and including the round of the last played game; games still owed
+    in those rounds stay scheduled as they are. Played games are matched in schedule order, so
+    a pairing that repeats later in the season is credited to its earliest unplayed occurrence.
+    """
+    remaining = Counter(tuple(sorted(game)) for game in played_games)
+    cutoff = 0
+    for r_idx, round_games in enumerate(schedule):
+        for game in round_games:
+            key = tuple(sorted(game))
+            if remaining[key] > 0:
+                remaining[key] -= 1
+                cutoff = r_idx + 1
+    return cutoff, sum(remaining.values())
@@ -0,0 +1,175 @@
+import os
+from itertools import combinations
+from collections import namedtuple
+import numpy as np
+
+# Exact partition of n players into groups of 4 minimizing the summed pair costs.
+# Same DP as the original pure-Python version in league_scheduling.add_round, but
+# every layer (masks after k groups) is relaxed with array ops instead of per-mask loops.
+#
+# Everything except the costs depends only on n: which masks each layer reaches, which
+# 4-set takes a mask to which, and how to walk back. That structure is built once per n
+# (kept in memory, optionally saved as .npz), so a round is just a cost gather plus a
+# segmented min-reduction per layer.
+
+# Bump when the table layout changes so stale .npz files are rebuilt
+TABLE_VERSION = 1
+
+DPLayer = namedtuple("DPLayer", ["src", "quad", "dst", "starts"])
+DPTables = namedtuple("DPTables", ["n", "quads", "quad_masks", "pair_index", "layers"])
+
+_TABLES = {}
+
+
+def free_indices(masks, n):
+    # (R, k) array of the unset bit positions of each mask, ascending. All masks share a popcount.
+    bits = (masks[:, None] >> np.arange(n)) & 1
+    rows, cols = np.nonzero(bits == 0)
+    return cols.reshape(len(masks), -1)
+
+
+def build_tables(n):
+    """
+    Structural tables for n players.
+
+    quads:      (Q, 4) player indices of every 4-set, in combinations() order
+    quad_masks: (Q,) bitmask of each 4-set
+    pair_index: (Q, 6) flat indices into an n x n cost matrix for the 6 pairs of each 4-set
+    layers:     one DPLayer per group placed. Candidate transitions c go from mask src[c] of
+                the previous layer to mask dst[c] of this one by adding 4-set quad[c]. They are
+                sorted by (dst, previous mask), so the first minimum within a dst segment is the
+                winner the original loop picked. starts[k] is where segment k begins.
+    """
+    if n % 4 != 0:
+        raise ValueError("Number of players must be a multiple of 4.")
+
+    quads = np.array(list(combinations(range(n), 4)), dtype=np.int64).reshape(-1, 4)
+    quad_masks = np.bitwise_or.reduce(np.left_shift(1, quads), axis=1)
+    pair_cols = list(combinations(range(4), 2))
+    pair_index = np.stack([quads[:, a] * n + quads[:, b] for a, b in pair_cols], axis=1)
+
+    quad_id = np.zeros(1 << n, dtype=np.int32)
+    quad_id[quad_masks] = np.arange(len(quad_masks), dtype=np.int32)
+
+    layers = []
+    masks = np.zeros(1, dtype=np.int64)
+    for _ in range(n // 4):
+        free = free_indices(masks, n)
+        k = free.shape[1]
+        picks = np.array(list(combinations(range(1, k), 3)), dtype=np.int64).reshape(-1, 3)
+        free_bits = np.left_shift(1, free)
+
+        # Every 4-set anchored at the lowest free index, for every mask at once: (R, C)
+        quad = free_bits[:, [0]] | free_bits[:, picks[:, 0]] | free_bits[:, picks[:, 1]] | free_bits[:, picks[:, 2]]
+        new = (masks[:, None] | quad).ravel()
+        src = np.repeat(np.arange(len(masks), dtype=np.int32), quad.shape[1])
+
+        # Rows are already in ascending previous-mask order, so a stable sort on the new
+        # mask gives (new mask, previous mask) order
+        order = np.argsort(new, kind="stable")
+        new = new[order]
+        boundary = np.ones(len(new), dtype=bool)
+        boundary[1:] = new[1:] != new[:-1]
+
+        layers.append(DPLayer(
+            src=src[order],
+            quad=quad_id[quad.ravel()[order]],
+            dst=(np.cumsum(boundary) - 1).astype(np.int32),
+            starts=np.flatnonzero(boundary),
+        ))
+        masks = new[boundary]
+
+    return DPTables(n, quads, quad_masks, pair_index, layers)
+
+
+def _cache_path(cache_dir, n):
+    return os.path.join(cache_dir, f"round_dp_n{n}_v{TABLE_VERSION}.npz")
+
+
+def save_tables(tables, path):
+    arrays = {"quads": tables.quads, "quad_masks": tables.quad_masks, "pair_index": tables.pair_index}
+    for i, layer in enumerate(tables.layers):
+        for field in DPLayer._fields:
+            arrays[f"layer{i}_{field}"] = getattr(layer, field)
+
+    # Write to a temp file first so a concurrent reader never sees half a file
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def load_tables(path, n):
+    with np.load(path) as data:
+        layers = [DPLayer(*(data[f"layer{i}_{field}"] for field in DPLayer._fields)) for i in range(n // 4)]
+        return DPTables(n, data["quads"], data["quad_masks"], data["pair_index"], layers)
+
+
+def dp_tables(n, cache_dir=None):
+    """
+    Tables for n players, from the in-process cache, then cache_dir/*.npz if given,
+    otherwise built (and saved to cache_dir when given).
+    """
+    if n in _TABLES:
+        return _TABLES[n]
+
+    path = _cache_path(cache_dir, n) if cache_dir else None
+    if path and os.path.exists(path):
+        tables = load_tables(path, n)
+    else:
+        tables = build_tables(n)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            save_tables(tables, path)
+
+    for arr in (tables.quads, tables.quad_masks, tables.pair_index, *(a for layer in tables.layers for a in layer)):
+        arr.setflags(write=False)
+    _TABLES[n] = tables
+    return tables
+
+
+def clear_cache():
+    _TABLES.clear()
+
+
+def quad_costs(cost, tables):
+    # One gather over the pair cost matrix: cost of every 4-set at once.
+    return cost.ravel()[tables.pair_index].sum(axis=1)
+
+
+def best_partition(cost, cache_dir=None):
+    """
+    Splits indices 0..n-1 into n/4 groups minimizing the sum of cost[a][b] over pairs in a group.
+
+    cost is an n x n integer matrix (only the upper triangle is read). Returns a list of
+    index 4-tuples, ordered the same way the original mask DP reconstructed them. Ties are
+    broken exactly like the original loop: lowest cost, then lowest previous mask.
+    """
+    cost = np.asarray(cost, dtype=np.int64)
+    n = cost.shape[0]
+    if n == 0:
+        return []
+
+    tables = dp_tables(n, cache_dir)
+    qcost = quad_costs(cost, tables)
+
+    values = np.zeros(1, dtype=np.int64)
+    winners = []
+    for layer in tables.layers:
+        candidate = values[layer.src] + qcost[layer.quad]
+        values = np.minimum.reduceat(candidate, layer.starts)
+
+        # First candidate in each segment that reaches the segment minimum
+        hits = np.flatnonzero(candidate == values[layer.dst])
+        first = np.ones(len(hits), dtype=bool)
+        first[1:] = layer.dst[hits[1:]] != layer.dst[hits[:-1]]
+        winners.append(hits[first])
+
+    # Reconstruct from the full mask (the only mask in the last layer) back to the empty one
+    grouping = []
+    k = 0
+    for layer, win in zip(reversed(tables.layers), reversed(winners)):
+        c = win[k]
+        grouping.append(tuple(int(i) for i in tables.quads[layer.quad[c]]))
+        k = layer.src[c]
+
+    return list(reversed(grouping))
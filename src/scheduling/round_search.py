@@ -0,0 +1,245 @@
+import warnings
+from itertools import combinations
+import numpy as np
+
+from scheduling.round_dp import best_partition
+from utils.instrument import count
+
+# Round grouping for seat counts the subset DP cannot hold (its tables grow as 2^n: about
+# 180MB at 20 seats, far more at 24). Same problem as round_dp.best_partition: split players
+# 0..n-1 into groups of 4 minimizing the summed pair costs.
+#
+# bnb: depth-first branch and bound. The lowest-numbered unplaced player always opens the next
+# group, so every partition is generated once. A grouping's cost is the sum, over players, of a
+# quarter of their own group's cost, so the lower bound for a set of unplaced players is the sum
+# of a quarter of each one's cheapest group of 4 among them; bounds are kept quadrupled so they
+# stay integers. Children are tried cheapest bound first and cut as soon as one cannot beat the
+# best grouping so far, which starts as a greedy grouping improved by swaps. Memory is the
+# 4-sets of each remaining size, O(n^4). The node budget grows with the seat count; past it
+# the best grouping found is returned with a warning, so above DP_MAX_SEATS "auto" is a
+# heuristic that is usually, not always, proven optimal.
+#
+# cpsat: the same model for OR-Tools CP-SAT (optional dependency), warm-started from bnb's
+# greedy grouping and stopped after time_limit seconds.
+#
+# Optimal groupings with equal cost can differ from the DP's (which breaks ties by mask order),
+# so backends give different, equally balanced, schedules.
+
+# Largest seat count "auto" leaves to the DP
+DP_MAX_SEATS = 20
+
+BACKENDS = ("auto", "dp", "bnb", "cpsat")
+
+# Branch-and-bound nodes allowed per seat of the round
+NODES_PER_SEAT = 500
+DEFAULT_TIME_LIMIT = 10.0
+
+_TRIPLES = {}
+_QUADS = {}
+
+
+def _triples(k):
+    # (C(k, 3), 3) array of every index triple of range(k), ascending
+    triples = _TRIPLES.get(k)
+    if triples is None:
+        triples = _TRIPLES[k] = np.array(list(combinations(range(k), 3)), dtype=np.intp).reshape(-1, 3)
+    return triples
+
+
+def _quads(k):
+    """
+    Every 4-set of range(k) as (quads, per position: order sorting the 4-sets by their player
+    there, and where each player's run starts in that order).
+    """
+    cached = _QUADS.get(k)
+    if cached is None:
+        quads = np.array(list(combinations(range(k), 4)), dtype=np.intp).reshape(-1, 4)
+        orders = [np.argsort(quads[:, t], kind="stable") for t in range(4)]
+        # Position t holds players t..k-4+t, each at least once
+        starts = [np.searchsorted(quads[order, t], np.arange(t, k - 3 + t)) for t, order in enumerate(orders)]
+        cached = _QUADS[k] = (quads, orders, starts)
+    return cached
+
+
+def cheapest_groups(cost, players):
+    # Cost of the cheapest group of 4 among `players` containing each of them
+    k = len(players)
+    quads, orders, starts = _quads(k)
+    a, b, c, d = players[quads].T
+    costs = cost[a, b] + cost[a, c] + cost[a, d] + cost[b, c] + cost[b, d] + cost[c, d]
+    cheapest = np.full(k, np.iinfo(np.int64).max)
+    for t in range(4):
+        cheapest[t:k - 3 + t] = np.minimum(cheapest[t:k - 3 + t], np.minimum.reduceat(costs[orders[t]], starts[t]))
+    return cheapest
+
+
+def group_cost(cost, group):
+    return int(sum(cost[a, b] for a, b in combinations(group, 2)))
+
+
+def _children(cost, remaining):
+    """
+    For the node whose unplaced players are `remaining` (ascending): the groups its first player
+    can open, as (others, triples, quadrupled lower bound of the rest after each group, group cost).
+    """
+    i, others = remaining[0], remaining[1:]
+    triples = _triples(len(others))
+    a, b, c = others[triples[:, 0]], others[triples[:, 1]], others[triples[:, 2]]
+    costs = cost[i, a] + cost[i, b] + cost[i, c] + cost[a, b] + cost[a, c] + cost[b, c]
+
+    if len(others) == 3:
+        return others, triples, np.zeros(1, dtype=np.int64), costs
+
+    # Cheapest group of each player among the others; removing players can only raise these, so
+    # dropping the group's own terms still bounds what is left after the group
+    cheapest = cheapest_groups(cost, others)
+    rest = cheapest.sum() - cheapest[triples].sum(axis=1)
+    return others, triples, rest, costs
+
+
+def greedy_partition(cost):
+    """
+    Groups built one at a time (first unplaced player with the cheapest three others), then
+    improved by swapping players between groups while that lowers the total.
+    """
+    cost = np.asarray(cost, dtype=np.int64)
+    remaining = np.arange(len(cost))
+    groups = []
+    while len(remaining):
+        i, others = remaining[0], remaining[1:]
+        triples = _triples(len(others))
+        a, b, c = others[triples[:, 0]], others[triples[:, 1]], others[triples[:, 2]]
+        costs = cost[i, a] + cost[i, b] + cost[i, c] + cost[a, b] + cost[a, c] + cost[b, c]
+        pick = triples[int(np.argmin(costs))]
+        groups.append([int(i), *(int(p) for p in others[pick])])
+        remaining = np.delete(others, pick)
+
+    improved = True
+    while improved:
+        improved = False
+        for g, h in combinations(range(len(groups)), 2):
+            for x in range(4):
+                for y in range(4):
+                    p, q = groups[g][x], groups[h][y]
+                    g_rest = [m for m in groups[g] if m != p]
+                    h_rest = [m for m in groups[h] if m != q]
+                    delta = (cost[q, g_rest].sum() + cost[p, h_rest].sum()
+                             - cost[p, g_rest].sum() - cost[q, h_rest].sum())
+                    if delta < 0:
+                        groups[g][x], groups[h][y] = q, p
+                        improved = True
+
+    return [tuple(sorted(group)) for group in sorted(groups, key=min)]
+
+
+def bnb_partition(cost, node_limit=None):
+    # Optimal grouping by branch and bound (best found if node_limit, by default
+    # NODES_PER_SEAT per seat, runs out)
+    cost = np.asarray(cost, dtype=np.int64)
+    n = cost.shape[0]
+    if n == 0:
+        return []
+    if node_limit is None:
+        node_limit = NODES_PER_SEAT * n
+
+    best = greedy_partition(cost)
+    best_cost = sum(group_cost(cost, g) for g in best)
+    nodes = 0
+    truncated = False
+    path = []
+
+    def search(remaining, acc):
+        nonlocal best, best_cost, nodes, truncated
+        if len(remaining) == 0:
+            if acc < best_cost:
+                best, best_cost = [tuple(g) for g in path], acc
+            return
+        nodes += 1
+        if nodes > node_limit:
+            truncated = True
+            return
+
+        others, triples, rest, costs = _children(cost, remaining)
+        bounds = 4 * (acc + costs) + rest
+        for k in np.argsort(bounds, kind="stable"):
+            # Costs are integers, so a child whose bound rounds up to best_cost cannot beat it
+            if bounds[k] > 4 * best_cost - 4 or truncated:
+                break
+            picked = triples[k]
+            path.append((int(remaining[0]), *(int(p) for p in others[picked])))
+            search(np.delete(others, picked), acc + int(costs[k]))
+            path.pop()
+
+    search(np.arange(n), 0)
+    count("round_bnb_nodes", nodes)
+    if truncated:
+        count("round_bnb_truncated")
+        warnings.warn(f"Branch and bound stopped after {node_limit} nodes on a {n}-seat round; "
+                      "its grouping may not be optimal.", RuntimeWarning, stacklevel=2)
+    return best
+
+
+def cpsat_partition(cost, time_limit=DEFAULT_TIME_LIMIT):
+    # Grouping from OR-Tools CP-SAT, warm-started from greedy_partition
+    try:
+        from ortools.sat.python import cp_model
+    except ImportError as e:
+        raise ImportError("The cpsat round backend needs OR-Tools (pip install ortools).") from e
+
+    cost = np.asarray(cost, dtype=np.int64)
+    n = cost.shape[0]
+    if n == 0:
+        return []
+    num_groups = n // 4
+    warm = greedy_partition(cost)
+
+    model = cp_model.CpModel()
+    # x[i][g]: player i is in group g. Groups are numbered by their lowest player, so player i
+    # can only be in groups 0..i (removes the relabelling symmetry).
+    x = [[model.NewBoolVar(f"x_{i}_{g}") for g in range(num_groups)] for i in range(n)]
+    for i in range(n):
+        model.AddExactlyOne(x[i][:i + 1])
+        for g in range(i + 1, num_groups):
+            model.Add(x[i][g] == 0)
+    for g in range(num_groups):
+        model.Add(sum(x[i][g] for i in range(n)) == 4)
+
+    # together[i, j] is forced on when i and j share any group; only costly pairs need one
+    objective = []
+    for i, j in combinations(range(n), 2):
+        if cost[i, j] > 0:
+            together = model.NewBoolVar(f"t_{i}_{j}")
+            for g in range(min(i + 1, num_groups)):
+                model.AddBoolOr([together, x[i][g].Not(), x[j][g].Not()])
+            objective.append(int(cost[i, j]) * together)
+    model.Minimize(sum(objective))
+
+    for g, group in enumerate(warm):
+        for i in group:
+            model.AddHint(x[i][g], 1)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return warm
+    if status != cp_model.OPTIMAL:
+        count("round_cpsat_not_optimal")
+    return [tuple(i for i in range(n) if solver.Value(x[i][g])) for g in range(num_groups)]
+
+
+def partition_round(cost, backend="auto", cache_dir=None):
+    """
+    Round grouping with the chosen backend: "dp" (round_dp, exact, memory grows as 2^n), "bnb",
+    "cpsat", or "auto" (dp up to DP_MAX_SEATS seats, bnb above, which may stop short of optimal).
+    """
+    n = len(cost)
+    if backend == "auto":
+        backend = "dp" if n <= DP_MAX_SEATS else "bnb"
+    if backend == "dp":
+        return best_partition(cost, cache_dir)
+    if backend == "bnb":
+        return bnb_partition(cost)
+    if backend == "cpsat":
+        return cpsat_partition(cost)
+    raise ValueError(f"Unknown round backend {backend!r} (choose from {', '.join(BACKENDS)}).")
@@ -0,0 +1,38 @@
+import csv
+
+SEAT_COLUMNS = ("east seat", "south seat", "west seat", "north seat")
+HEADERS = ["match_id", "week", *SEAT_COLUMNS]
+
+
+def read_schedule_csv(path):
+    """
+    Reads a schedule CSV written by league_scheduling (or schedule_11_players).
+
+    Rows sharing a match_id are one round of simultaneous games. Returns
+    (schedule, weeks): schedule is a list of rounds, each a list of seat-ordered
+    4-tuples, and weeks[r] is the week of round r.
+    """
+    schedule, weeks = [], []
+    last_match_id = None
+
+    with open(path, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            game = tuple(int(row[k]) for k in SEAT_COLUMNS)
+            if row["match_id"] != last_match_id:
+                schedule.append([])
+                weeks.append(int(row["week"]))
+                last_match_id = row["match_id"]
+            schedule[-1].append(game)
+
+    return schedule, weeks
+
+
+def write_schedule_csv(schedule, weeks, path):
+    # One row per game; match_id numbers the rounds from 1
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        for r_idx, round_games in enumerate(schedule):
+            for game in round_games:
+                writer.writerow([r_idx + 1, weeks[r_idx], *game])
@@ -0,0 +1,124 @@
+import csv
+import os
+import numpy as np
+
+from scheduling.schedule_io import SEAT_COLUMNS
+
+# Array-backed view of a schedule CSV (one row per game: match_id, week, four seats).
+#
+# Rounds are runs of rows sharing a match_id, numbered from 1 in file order, exactly as
+# read_schedule_csv groups them. match_id, week, round and player lookups are dicts of row
+# index arrays, built once from the columns.
+#
+# load() keeps a binary sidecar (.<name>.cache.npz next to the CSV) holding the parsed
+# columns and the CSV's mtime and size; any change to the CSV makes it stale.
+
+# Bump when the sidecar layout changes
+STORE_VERSION = 1
+
+
+def _index(keys, rows=None):
+    # {key: row indices holding it}, rows in ascending order
+    rows = np.arange(len(keys)) if rows is None else rows
+    order = np.argsort(keys, kind="stable")
+    values, starts = np.unique(keys[order], return_index=True)
+    bounds = np.append(starts, len(order))
+    return {int(v): rows[order[bounds[i]:bounds[i + 1]]] for i, v in enumerate(values)}
+
+
+class ScheduleStore:
+    def __init__(self, match_id, week, seats):
+        self.match_id = np.asarray(match_id, dtype=np.int32)
+        self.week = np.asarray(week, dtype=np.int16)
+        seats = np.asarray(seats).reshape(-1, 4)
+        self.seats = seats.astype(np.int8 if seats.size == 0 or seats.max() <= np.iinfo(np.int8).max else np.int16)
+
+        new_round = np.ones(len(self.match_id), dtype=bool)
+        new_round[1:] = self.match_id[1:] != self.match_id[:-1]
+        self.round = np.cumsum(new_round).astype(np.int32)
+
+        self.by_match_id = _index(self.match_id)
+        self.by_week = _index(self.week)
+        self.by_round = _index(self.round)
+        self.by_player = _index(self.seats.ravel(), np.repeat(np.arange(len(self.seats)), 4))
+
+    def __len__(self):
+        return len(self.seats)
+
+    def game(self, row):
+        return tuple(int(p) for p in self.seats[row])
+
+    def games(self, rows):
+        return [tuple(g) for g in self.seats[rows].tolist()]
+
+    def match(self, match_id):
+        # Games of one match_id (one game, or a round of simultaneous games); [] if unknown
+        return self.games(self.by_match_id.get(match_id, []))
+
+    def week_games(self, week):
+        return self.games(self.by_week.get(week, []))
+
+    def round_games(self, round_index):
+        # round_index is 1-based
+        return self.games(self.by_round.get(round_index, []))
+
+    def player_rows(self, player):
+        return self.by_player.get(player, np.empty(0, dtype=np.intp))
+
+    def weeks(self):
+        return sorted(self.by_week)
+
+    def rounds(self):
+        # (schedule, weeks) like schedule_io.read_schedule_csv
+        numbers = sorted(self.by_round)
+        return [self.round_games(r) for r in numbers], [int(self.week[self.by_round[r][0]]) for r in numbers]
+
+    @classmethod
+    def from_csv(cls, path):
+        match_ids, weeks, seats = [], [], []
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    game = [int(row[k]) for k in SEAT_COLUMNS]
+                    match_id, week = int(row["match_id"]), int(row["week"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                match_ids.append(match_id)
+                weeks.append(week)
+                seats.append(game)
+        return cls(match_ids, weeks, seats)
+
+    def save(self, path, source_stat):
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, version=STORE_VERSION, mtime_ns=source_stat.st_mtime_ns, size=source_stat.st_size,
+                 match_id=self.match_id, week=self.week, seats=self.seats)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, use_cache=True):
+        """
+        Store for a schedule CSV, from its sidecar cache when that is still fresh.
+        """
+        stat = os.stat(path)
+        cache = cache_path(path)
+        if use_cache and os.path.exists(cache):
+            try:
+                with np.load(cache) as data:
+                    if (int(data["version"]) == STORE_VERSION and int(data["mtime_ns"]) == stat.st_mtime_ns
+                            and int(data["size"]) == stat.st_size):
+                        return cls(data["match_id"], data["week"], data["seats"])
+            except (OSError, ValueError, KeyError):
+                pass
+
+        store = cls.from_csv(path)
+        if use_cache:
+            try:
+                store.save(cache, stat)
+            except OSError:
+                pass  # read-only checkout; just parse next time too
+        return store
+
+
+def cache_path(path):
+    head, name = os.path.split(path)
+    return os.path.join(head, f".{name}.cache.npz")
@@ -0,0 +1,154 @@
+from collections import deque
+from itertools import permutations
+import numpy as np
+
+# Seating is a 4x4 assignment problem per game: cost[i][s] = how often player i has sat in seat s.
+# With only 24 possible assignments, scoring all of them for every game in one array op is exact
+# and cheaper than a general assignment solver.
+
+# PERMS[k][s] = position within the game of the player who sits in seat s, in permutations() order
+PERMS = np.array(list(permutations(range(4))), dtype=np.intp)
+SEATS = np.arange(4)
+
+
+class SeatCounts:
+    """
+    How often each player has sat in each seat, for player ids 1..num_players.
+    Backed by a (num_players + 1, 4) array so player ids index rows directly (row 0 unused).
+    """
+
+    def __init__(self, num_players, dtype=np.int16):
+        self.num_players = num_players
+        self.counts = np.zeros((num_players + 1, 4), dtype=dtype)
+
+    def __getitem__(self, player):
+        return self.counts[player]
+
+    def __repr__(self):
+        return f"SeatCounts(num_players={self.num_players}, min={self.min()}, max={self.max()}, std={self.std():.4f})"
+
+    def add_game(self, game, count=1):
+        self.counts[np.asarray(game, dtype=np.intp), SEATS] += count
+
+    def add_games(self, games, count=1):
+        g = np.asarray(games, dtype=np.intp).reshape(-1, 4)
+        np.add.at(self.counts, (g, SEATS), count)
+
+    def matrix(self, players=None):
+        # (players x 4) counts, all players by default
+        if players is None:
+            return self.counts[1:].astype(np.int64)
+        return self.counts[np.asarray(players, dtype=np.intp)].astype(np.int64)
+
+    def std(self):
+        return float(self.counts[1:].std())
+
+    def min(self):
+        return int(self.counts[1:].min())
+
+    def max(self):
+        return int(self.counts[1:].max())
+
+
+def best_seatings(games, seat_counts):
+    """
+    Seat order for each game minimizing the summed seat counts of its players, all games at once.
+
+    games is a (G, 4) array-like of player ids; returns a (G, 4) array in seat order. Ties go to
+    the first ordering in permutations() order, same as min(permutations(game), key=...).
+    """
+    g = np.asarray(games, dtype=np.intp).reshape(-1, 4)
+    costs = seat_counts.counts[g]  # (G, player, seat)
+    totals = costs[:, PERMS, SEATS].sum(axis=2)  # (G, 24)
+    return np.take_along_axis(g, PERMS[totals.argmin(axis=1)], axis=1)
+
+
+def seat_round(games, seat_counts):
+    # Seats every game of a round (players are disjoint) and records the seats taken
+    seated = best_seatings(games, seat_counts)
+    seat_counts.add_games(seated)
+    return [tuple(int(p) for p in game) for game in seated]
+
+
+def _seat_chain(rounds, seat_counts):
+    """
+    Applies one chain of season-wide seat swaps that lowers the sum of squared seat counts;
+    False if there is none.
+
+    Take a player x with at least two more games in seat s than in seat t. In every game where
+    x sits in s, swapping with whoever sits in t moves x towards balance and hands that player
+    one extra s; they pass it on the same way in another game, and so on. Intermediate players
+    end where they started, so the chain only changes its two ends, and it improves as soon as
+    it reaches a player z with more t than s. Following unused games from x must end at such a
+    player (x gives out more s than it takes back), so this finds a chain whenever some player
+    is not balanced to within one game per seat.
+    """
+    counts = seat_counts.counts
+    at_seat = {}  # (player, seat) -> games (r, g) where they sit there
+    for r, round_games in enumerate(rounds):
+        for g, game in enumerate(round_games):
+            for seat, p in enumerate(game):
+                at_seat.setdefault((p, seat), []).append((r, g))
+
+    for x in range(1, seat_counts.num_players + 1):
+        for s, t in permutations(range(4), 2):
+            if counts[x, s] - counts[x, t] < 2:
+                continue
+            # Breadth-first over players, reached through a game where the previous one sits in s
+            came_from = {x: None}
+            queue = deque([x])
+            while queue:
+                u = queue.popleft()
+                for r, g in at_seat.get((u, s), ()):
+                    v = rounds[r][g][t]
+                    if v in came_from:
+                        continue
+                    came_from[v] = (u, r, g)
+                    if counts[v, t] > counts[v, s]:
+                        while came_from[v] is not None:
+                            u, r, g = came_from[v]
+                            game = list(rounds[r][g])
+                            seat_counts.add_game(game, -1)
+                            game[s], game[t] = game[t], game[s]
+                            seat_counts.add_game(game)
+                            rounds[r][g] = tuple(game)
+                            v = u
+                        return True
+                    queue.append(v)
+    return False
+
+
+def reseat_schedule(schedule, num_players=None, max_passes=50):
+    """
+    Re-seats a whole season without touching who plays in which game.
+
+    Starting from the current seating, repeatedly takes each round out and re-seats it against
+    the rest of the season until a pass changes nothing. Round by round this can get stuck
+    short of balance, so chains of seat swaps across the season (_seat_chain) finish the job:
+    every player ends up within one game of even in each seat. Every change strictly lowers
+    the sum of squared seat counts, so the result is never worse than the input.
+    Returns (schedule, seat_counts).
+    """
+    num_players = num_players or max(p for round_games in schedule for game in round_games for p in game)
+    seat_counts = SeatCounts(num_players, dtype=np.int32)
+    rounds = [[tuple(game) for game in round_games] for round_games in schedule]
+    for round_games in rounds:
+        seat_counts.add_games(round_games)
+
+    # An already-optimal game keeps its order: the identity is PERMS[0] and argmin keeps the
+    # first minimum, so a round only changes on a strict improvement and the passes terminate.
+    for _ in range(max_passes):
+        changed = False
+        for r, round_games in enumerate(rounds):
+            seat_counts.add_games(round_games, -1)
+            seated = seat_round(round_games, seat_counts)
+            if seated != round_games:
+                rounds[r] = seated
+                changed = True
+        if not changed:
+            break
+
+    while _seat_chain(rounds, seat_counts):
+        pass
+
+    return rounds, seat_counts
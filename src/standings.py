@@ -0,0 +1,245 @@
+import csv
+import os
+import sys
+import numpy as np
+
+# read_csv (teams.csv) lives at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.result_writers import CsvWriter, WIDE_COLUMNS, wide_rows
+
+# Standings from exported results. Games are ingested in batches into per-player running
+# totals (NumPy arrays indexed by player id), so adding a tick's new games costs the same
+# however long the season is. Teams are only applied when building tables: team stats are
+# sums of their members' rows, so changing teams.csv never needs a re-ingest.
+#
+# Placement within a game is by part_point, ties going to the earlier seat.
+
+COMPUTER = "computer"
+
+PLAYER_COLUMNS = [
+    "rank", "nickname", "team", "games", "total_point", "avg_total_point", "avg_part_point",
+    "first", "second", "third", "fourth", "avg_placement",
+]
+TEAM_COLUMNS = [
+    "rank", "team", "games", "total_point", "avg_total_point", "avg_part_point",
+    "first", "second", "third", "fourth", "avg_placement",
+]
+# One row per pair of teams that met. An encounter is one member of each team in the same game
+# (two members of each in one game make four); above/below count who placed higher.
+HEAD_TO_HEAD_COLUMNS = ["team", "opponent", "encounters", "above", "below", "above_rate"]
+
+# Every ordered pair of seats (a, b), a != b
+_SEAT_A, _SEAT_B = np.nonzero(~np.eye(4, dtype=bool))
+
+
+def _points(values):
+    return np.array([[0 if v in ("", None) else int(v) for v in row] for row in values], dtype=np.int64)
+
+
+def placements(part_points):
+    # (G, 4) part points -> (G, 4) placement of each seat, 0 = first
+    seats = np.broadcast_to(np.arange(4), part_points.shape)
+    order = np.lexsort((seats, -part_points), axis=-1)
+    place = np.empty_like(order)
+    np.put_along_axis(place, order, np.arange(4)[None, :].repeat(len(order), axis=0), axis=-1)
+    return place
+
+
+class Standings:
+    def __init__(self):
+        self.nicknames = []
+        self.player_id = {}
+        self.num_games = 0
+        self._allocate(0)
+
+    def _allocate(self, n):
+        self.games = np.zeros(n, dtype=np.int64)
+        self.total_point = np.zeros(n, dtype=np.int64)
+        self.part_point = np.zeros(n, dtype=np.int64)
+        self.place_counts = np.zeros((n, 4), dtype=np.int64)
+        # met[a, b]: games a and b played together; above[a, b]: of those, games a placed above b
+        self.met = np.zeros((n, n), dtype=np.int64)
+        self.above = np.zeros((n, n), dtype=np.int64)
+
+    def _grow(self, n):
+        old = len(self.games)
+        if n <= old:
+            return
+        pad = n - old
+        self.games = np.pad(self.games, (0, pad))
+        self.total_point = np.pad(self.total_point, (0, pad))
+        self.part_point = np.pad(self.part_point, (0, pad))
+        self.place_counts = np.pad(self.place_counts, ((0, pad), (0, 0)))
+        self.met = np.pad(self.met, ((0, pad), (0, pad)))
+        self.above = np.pad(self.above, ((0, pad), (0, pad)))
+
+    def _ids(self, nicknames):
+        ids = np.empty((len(nicknames), 4), dtype=np.intp)
+        for g, row in enumerate(nicknames):
+            for s, name in enumerate(row):
+                pid = self.player_id.get(name)
+                if pid is None:
+                    pid = self.player_id[name] = len(self.nicknames)
+                    self.nicknames.append(name)
+                ids[g, s] = pid
+        self._grow(len(self.nicknames))
+        return ids
+
+    def add_rows(self, rows):
+        """
+        Adds games given as wide result rows (WIDE_COLUMNS order, as in the exported CSV).
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        nicknames = [[row[3 + 3 * s] for s in range(4)] for row in rows]
+        part = _points([[row[4 + 3 * s] for s in range(4)] for row in rows])
+        total = _points([[row[5 + 3 * s] for s in range(4)] for row in rows])
+
+        ids = self._ids(nicknames)
+        place = placements(part)
+
+        np.add.at(self.games, ids, 1)
+        np.add.at(self.total_point, ids, total)
+        np.add.at(self.part_point, ids, part)
+        np.add.at(self.place_counts, (ids, place), 1)
+
+        a, b = ids[:, _SEAT_A], ids[:, _SEAT_B]
+        np.add.at(self.met, (a, b), 1)
+        np.add.at(self.above, (a, b), (place[:, _SEAT_A] < place[:, _SEAT_B]).astype(np.int64))
+        self.num_games += len(rows)
+
+    def add_records(self, games):
+        # Games as returned by the contest API
+        self.add_rows(row for game in games for row in wide_rows(game, typed=True))
+
+    def add_csv(self, path):
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            if next(reader, None) != WIDE_COLUMNS:
+                raise ValueError(f"{path} is not a wide results CSV.")
+            self.add_rows(reader)
+
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, nicknames=np.array(self.nicknames, dtype=str), num_games=self.num_games,
+                 games=self.games, total_point=self.total_point, part_point=self.part_point,
+                 place_counts=self.place_counts, met=self.met, above=self.above)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        standings = cls()
+        with np.load(path) as data:
+            standings.nicknames = [str(n) for n in data["nicknames"]]
+            standings.player_id = {n: i for i, n in enumerate(standings.nicknames)}
+            standings.num_games = int(data["num_games"])
+            for name in ("games", "total_point", "part_point", "place_counts", "met", "above"):
+                setattr(standings, name, data[name].copy())
+        return standings
+
+    def team_index(self, teams):
+        """
+        Returns (team names, (players, teams) 0/1 membership matrix) for a get_teams() dict.
+        """
+        names = list(teams)
+        member_of = {p: t for t, team in enumerate(names) for p in teams[team]}
+        membership = np.zeros((len(self.nicknames), len(names)), dtype=np.int64)
+        for pid, nickname in enumerate(self.nicknames):
+            if nickname in member_of:
+                membership[pid, member_of[nickname]] = 1
+        return names, membership
+
+    def team_head_to_head(self, teams):
+        # (team names, met, above) summed over member pairs; a team's diagonal counts its own members meeting
+        names, m = self.team_index(teams)
+        return names, m.T @ self.met @ m, m.T @ self.above @ m
+
+    def head_to_head_table(self, teams):
+        # Rows in HEAD_TO_HEAD_COLUMNS order, for every ordered pair of different teams that met
+        names, met, above = self.team_head_to_head(teams)
+        rows = []
+        for a, team in enumerate(names):
+            for b, opponent in enumerate(names):
+                if a != b and met[a, b]:
+                    rows.append([team, opponent, int(met[a, b]), int(above[a, b]), int(met[a, b] - above[a, b]),
+                                 round(float(above[a, b] / met[a, b]), 3)])
+        return rows
+
+    def _table(self, labels, games, total_point, part_point, place_counts, extra=None):
+        played = np.maximum(games, 1)
+        avg_total = total_point / played
+        avg_part = part_point / played
+        avg_place = (place_counts @ np.arange(1, 5)) / played
+
+        order = sorted(range(len(labels)), key=lambda i: (-total_point[i], labels[i]))
+        rows = []
+        for rank, i in enumerate(order, start=1):
+            row = [rank, labels[i]]
+            if extra is not None:
+                row.append(extra[i])
+            row += [int(games[i]), int(total_point[i]), round(float(avg_total[i]), 1), round(float(avg_part[i]), 1),
+                    *(int(c) for c in place_counts[i]), round(float(avg_place[i]), 3)]
+            rows.append(row)
+        return rows
+
+    def player_table(self, teams=None):
+        # Rows in PLAYER_COLUMNS order, best total_point first
+        keep = np.array([n != COMPUTER for n in self.nicknames], dtype=bool)
+        labels = np.array(self.nicknames, dtype=object)[keep]
+        team_of = {p: t for t, team in (teams or {}).items() for p in team}
+        return self._table(labels, self.games[keep], self.total_point[keep], self.part_point[keep],
+                           self.place_counts[keep], extra=[team_of.get(n, "") for n in labels])
+
+    def team_table(self, teams):
+        # Rows in TEAM_COLUMNS order: each team is the sum of its members' games
+        names, m = self.team_index(teams)
+        return self._table(np.array(names, dtype=object), self.games @ m, self.total_point @ m,
+                           self.part_point @ m, m.T @ self.place_counts)
+
+
+def write_table(path, columns, rows):
+    writer = CsvWriter(path, columns)
+    writer.begin()
+    writer.write_rows(rows)
+    writer.commit()
+
+
+def write_standings(standings, teams, base):
+    # base_players.csv, base_teams.csv and base_head_to_head.csv
+    write_table(f"{base}_players.csv", PLAYER_COLUMNS, standings.player_table(teams))
+    write_table(f"{base}_teams.csv", TEAM_COLUMNS, standings.team_table(teams))
+    write_table(f"{base}_head_to_head.csv", HEAD_TO_HEAD_COLUMNS, standings.head_to_head_table(teams))
+
+
+def main(argv=None):
+    import argparse
+    from read_csv import get_teams
+
+    parser = argparse.ArgumentParser(description="Player and team standings from an exported results CSV")
+    parser.add_argument("results", help="Wide results CSV from export_results_csv.py")
+    parser.add_argument("--output", help="Write <output>_players.csv, _teams.csv and _head_to_head.csv instead of printing")
+    args = parser.parse_args(argv)
+
+    teams, _ = get_teams()
+    standings = Standings()
+    standings.add_csv(args.results)
+
+    if args.output:
+        write_standings(standings, teams, args.output)
+        print(f"Standings for {standings.num_games} games written to {args.output}_players.csv, "
+              f"{args.output}_teams.csv and {args.output}_head_to_head.csv")
+        return
+
+    for title, columns, rows in (("Players", PLAYER_COLUMNS, standings.player_table(teams)),
+                                 ("Teams", TEAM_COLUMNS, standings.team_table(teams)),
+                                 ("Head to head", HEAD_TO_HEAD_COLUMNS, standings.head_to_head_table(teams))):
+        print(f"{title} ({standings.num_games} games):")
+        print("\t".join(columns))
+        for row in rows:
+            print("\t".join(str(v) for v in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,66 +1,163 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import requests
-from utils.auth import get_auth_token
+from requests.adapters import HTTPAdapter
+from utils.auth import get_auth_token, invalidate_auth_token
 from utils.helpers import get_env
+from utils.instrument import count, timed
+
+# MJS_API_ROOT points everything at another server, e.g. a local mock for dry runs
+API_ROOT = get_env('MJS_API_ROOT', "https://engs.mahjongsoul.com/api/contest_gate/api/contest")
+
+class MjsClient:
+    """
+    Client for the contest gate API that keeps one pooled keep-alive session.
+
+    Every request gets a (connect, read) timeout. 429 responses are retried with exponential
+    backoff (honouring Retry-After, capped at max_delay seconds); 5xx responses and connection errors are only retried for
+    GET, so a create_game_plan POST is never sent twice after the server may have acted on it.
+    A 401 means the token expired early: the client logs in again and repeats the call once.
+    """
+
+    def __init__(self, token=None, api_root=API_ROOT, timeout=None, retries=None, backoff=0.5, max_delay=None, pool_size=10):
+        self.api_root = api_root.rstrip('/')
+        self.timeout = timeout or (5, float(get_env('MJS_HTTP_TIMEOUT', 30)))
+        self.retries = int(get_env('MJS_HTTP_RETRIES', 3)) if retries is None else retries
+        self.backoff = backoff
+        self.max_delay = float(get_env('MJS_HTTP_MAX_RETRY_DELAY', 30)) if max_delay is None else max_delay
+        self._token = token
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def token(self):
+        # get_auth_token is cached, so this only logs in when the token is missing or near expiry
+        return self._token or get_auth_token()
+
+    def _retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = self.backoff * (2 ** attempt)
+        # A server asking for minutes would otherwise stall the caller (and a workflow run)
+        return min(delay, self.max_delay)
+
+    def send(self, method, url, verbose=False, **kwargs):
+        """
+        session.request with the client's timeout and retry policy. Returns the last response;
+        raises the last connection error if every attempt failed to connect.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if method != "GET" or last_attempt:
+                    raise
+                response = None
+                count("api_retries", method=method, reason="connection")
+                if verbose:
+                    print(f"{method} {url} failed ({e}), retrying")
+            else:
+                retryable = response.status_code == 429 or (response.status_code >= 500 and method == "GET")
+                if not retryable or last_attempt:
+                    return response
+                count("api_retries", method=method, reason=response.status_code)
+                if verbose:
+                    print(f"{method} {url} returned {response.status_code}, retrying")
+
+            time.sleep(self._retry_delay(attempt, response))
+
+    def request(self, method, path, payload=None, params=None, token=None, verbose=False):
+        """
+        Makes a contest API call with the default headers.
+
+        Args:
+            method (str): HTTP method, either 'GET' or 'POST'.
+            path (str): The endpoint path (e.g. '/users').
+            payload (dict, optional): JSON payload for POST requests.
+            params (dict, optional): Query parameters for the request.
+            token (str, optional): Auth token to use instead of the client's own.
+
+        Returns:
+            Response: The response object from requests.
+
+        Raises:
+            ValueError: If the HTTP method is not supported.
+        """
+        if method not in ["GET", "POST"]:
+            raise ValueError("Unsupported HTTP method. Use 'GET' or 'POST'.")
+
+        # Construct full URL
+        url = f"{self.api_root}/{path.lstrip('/')}"
+
+        # Default headers
+        auth_token = token or self.token
+        headers = {
+            'accept': 'application/json, text/plain, */*',
+            'authorization': f'Majsoul {auth_token}',
+            'origin': 'https://mahjongsoul.tournament.yo-star.com'
+        }
+
+        default_queryparams = {
+            "unique_id": get_env('MJS_CONTEST_ID'),  # Replace with your actual contest ID
+            "season_id": get_env('MJS_SEASON_ID', 1),
+        }
+
+        params = {**default_queryparams, **(params or {})}
+
+        if verbose:
+            redacted_headers = {k: v for k, v in headers.items() if k != 'authorization'}
+            print(f"Making {method} request to {url}")
+            print(f"Headers: {redacted_headers}")
+            print(f"Query Params: {params}")
+            if payload:
+                print(f"Payload: {payload}")
+
+        kwargs = {'headers': headers, 'params': params}
+        if method == "POST":
+            kwargs['json'] = payload
+        endpoint = path.strip('/')
+        with timed("api_request", method=method, endpoint=endpoint):
+            response = self.send(method, url, verbose=verbose, **kwargs)
+
+        # Rejected token: re-login once, unless the caller pinned a token of their own.
+        # The request was refused, so repeating a POST cannot create anything twice.
+        if response.status_code == 401 and not (token or self._token):
+            if verbose:
+                print("Token rejected, logging in again")
+            # Threads that got a 401 together share one login: only the first invalidates
+            invalidate_auth_token(auth_token)
+            headers['authorization'] = f'Majsoul {get_auth_token(isVerbose=verbose)}'
+            with timed("api_request", method=method, endpoint=endpoint):
+                response = self.send(method, url, verbose=verbose, **kwargs)
+        count("api_responses", method=method, endpoint=endpoint, status=response.status_code)
+        count("api_response_bytes", len(response.content), method=method, endpoint=endpoint)
+        return response
+
+_client = None
+
+def get_client():
+    # Shared client so every call in a process reuses the same connections and token
+    # MJS_TOKEN skips the passport login (for mock servers or a token obtained elsewhere)
+    global _client
+    if _client is None:
+        _client = MjsClient(token=get_env('MJS_TOKEN'))
+    return _client
 
 def mjs_call(method, path, payload=None, params=None, token=None, verbose=False):
     """
-    Wrapper around requests for making API calls with default headers.
-    
-    Args:
-        method (str): HTTP method, either 'GET' or 'POST'.
-        path (str): The endpoint path (e.g. '/users').
-        payload (dict, optional): JSON payload for POST requests.
-        queryparams (dict, optional): Query parameters for the request.
-        
-    Returns:
-        Response: The response object from requests.
-        
-    Raises:
-        ValueError: If the HTTP method is not supported.
+    Wrapper around the shared MjsClient for making API calls with default headers.
+    See MjsClient.request for arguments.
     """
-    API_ROOT = "https://engs.mahjongsoul.com/api/contest_gate/api/contest"
-
-    if method not in ["GET", "POST"]:
-        raise ValueError("Unsupported HTTP method. Use 'GET' or 'POST'.")
-    
-    if not token:
-        token = get_auth_token()
-    
-    # Normalize method
-    method = method.upper()
-    
-    # Construct full URL
-    url = f"{API_ROOT.rstrip('/')}/{path.lstrip('/')}"
-
-    # Default headers
-    headers = {
-        'accept': 'application/json, text/plain, */*',
-        'authorization': f'Majsoul {token}',
-        'origin': 'https://mahjongsoul.tournament.yo-star.com'
-    }
-    
-    default_queryparams = {
-        "unique_id": get_env('MJS_CONTEST_ID'),  # Replace with your actual contest ID
-        "season_id": get_env('MJS_SEASON_ID', 1),
-    }
-    
-    params = {} if not params else {**default_queryparams, **params}
-    
-    if verbose:
-        redacted_headers = {k: v for k, v in headers.items() if k != 'authorization'}
-        print(f"Making {method} request to {url}")
-        print(f"Headers: {redacted_headers}")
-        print(f"Query Params: {params}")
-        if payload:
-            print(f"Payload: {payload}")
-
-    # Make the HTTP request
-    if method == "GET":
-        response = requests.get(url, headers=headers, params=params)
-    elif method == "POST":
-        response = requests.post(url, headers=headers, json=payload, params=params)
-
-    return response
+    return get_client().request(method, path, payload=payload, params=params, token=token, verbose=verbose)
 
 def mjs_get(path, queryparams=None, token=None, verbose=False):
     return mjs_call("GET", path, params=queryparams, token=token, verbose=verbose)
@@ -68,17 +165,72 @@ def mjs_get(path, queryparams=None, token=None, verbose=False):
 def mjs_post(path, payload=None, queryparams=None, token=None, verbose=False):
     return mjs_call("POST", path, payload=payload, params=queryparams, token=token, verbose=verbose)
 
-def fetch_results_csv(verbose=False):
-    """
-    Fetches the results CSV from the API.
-    
-    Returns:
-        str: The CSV content as a string.
-    """
+RECORDS_PAGE_SIZE = 1000
+
+def fetch_records_page(offset, limit=RECORDS_PAGE_SIZE, verbose=False):
+    # One page of /fetch_contest_game_records; returns the response's "data" object
     params = {
-        "offset": 0,
-        "limit": 1000
+        "offset": offset,
+        "limit": limit
     }
     response = mjs_get("/fetch_contest_game_records", queryparams=params, verbose=verbose)
     response.raise_for_status()
-    return response.json()["data"]["record_list"]
+    return response.json()["data"]
+
+def iter_game_records(page_size=RECORDS_PAGE_SIZE, workers=None, verbose=False, start=0, stop=None):
+    """
+    Yields every game record of the contest season, page by page in API order.
+
+    The first page tells us the total; the remaining pages are fetched concurrently with at most
+    `workers` requests in flight (default MJS_FETCH_WORKERS or 4), so memory stays bounded by a few
+    pages. If the API does not report a total, pages are fetched one after another until a short one.
+    Records are de-duplicated by uuid, since a game finishing mid-fetch shifts later offsets by one.
+
+    start/stop limit the fetch to the pages covering offsets [start, stop) (the last page is not trimmed).
+    """
+    workers = workers or int(get_env('MJS_FETCH_WORKERS', 4))
+    seen = set()
+
+    def fresh(records):
+        for record in records:
+            key = record.get('uuid')
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            yield record
+
+    if stop is not None and start >= stop:
+        return
+
+    first = fetch_records_page(start, page_size, verbose=verbose)
+    yield from fresh(first["record_list"])
+
+    total = first.get("total")
+    if total is None:
+        page, offset = first["record_list"], start + page_size
+        while len(page) == page_size and (stop is None or offset < stop):
+            page = fetch_records_page(offset, page_size, verbose=verbose)["record_list"]
+            yield from fresh(page)
+            offset += page_size
+        return
+
+    end = int(total) if stop is None else min(int(total), stop)
+    offsets = iter(range(start + page_size, end, page_size))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(fetch_records_page, o, page_size, verbose) for o in islice(offsets, workers))
+        while pending:
+            page = pending.popleft().result()["record_list"]
+            offset = next(offsets, None)
+            if offset is not None:
+                pending.append(pool.submit(fetch_records_page, offset, page_size, verbose))
+            yield from fresh(page)
+
+def fetch_results_csv(verbose=False):
+    """
+    Fetches every game record from the API.
+
+    Returns:
+        list: All game records. Prefer iter_game_records to stream them instead.
+    """
+    return list(iter_game_records(verbose=verbose))
@@ -1,11 +1,36 @@
+import json
+import os
+import threading
+import time
+from contextlib import suppress
 import requests
 from utils.helpers import get_env
+from utils.instrument import count, timer
 
 # Not sure what exactly these represent, but needed for auth. See README for how to obtain.
 MJS_SECRET=get_env('MJS_SECRET')
 MJS_UID=get_env('MJS_UID')
 
-def get_auth_token(isVerbose=False):
+# Overridable so everything can run against a local mock (benchmarks/mock_contest_api.py)
+LOGIN_URL = get_env('MJS_LOGIN_URL', 'https://passport.mahjongsoul.com/user/login')
+OAUTH_URL = get_env('MJS_OAUTH_URL', "https://engs.mahjongsoul.com/api/contest_gate/api/login?method=oauth2")
+
+# How long a token is trusted, and how long before that it is proactively refreshed (seconds)
+TOKEN_TTL = int(get_env('MJS_TOKEN_TTL', 3600))
+REFRESH_MARGIN = int(get_env('MJS_TOKEN_REFRESH_MARGIN', 300))
+
+# Optional file to share the token between processes (e.g. successive cron runs on one machine)
+TOKEN_CACHE_FILE = get_env('MJS_TOKEN_CACHE')
+
+LOGIN_TIMEOUT = (5, 30)
+
+_cached = {"token": None, "expires_at": 0.0}
+# Held while checking, refreshing or invalidating the token, so concurrent callers that all
+# find it stale (or all got a 401) wait for one login instead of each doing their own
+_lock = threading.Lock()
+
+@timer("auth_login")
+def _login(isVerbose=False):
     # Step 1: Exchange initial token for accessToken
     headers = {
         'accept': 'application/json, text/plain, */*',
@@ -13,14 +38,13 @@ def get_auth_token(isVerbose=False):
         'origin': 'https://mahjongsoul.tournament.yo-star.com'
     }
 
-    login_url = 'https://passport.mahjongsoul.com/user/login'
     login_payload = {
         "uid": MJS_UID,
         "token": MJS_SECRET,
         "deviceId": f"web|{MJS_UID}"
     }
 
-    response1 = requests.post(login_url, headers=headers, json=login_payload)
+    response1 = requests.post(LOGIN_URL, headers=headers, json=login_payload, timeout=LOGIN_TIMEOUT)
     response1.raise_for_status()  # Raises error if the request failed
     response_data = response1.json()
 
@@ -35,14 +59,13 @@ def get_auth_token(isVerbose=False):
         raise ValueError("Failed to retrieve access token in Auth Step 1.")
 
     # Step 2: Exchange accessToken for auth token
-    auth_url = "https://engs.mahjongsoul.com/api/contest_gate/api/login?method=oauth2"
     auth_payload = {
         "type": 8,
         "code": access_token,
         "uid": int(MJS_UID)
     }
 
-    response2 = requests.post(auth_url, headers=headers, json=auth_payload)
+    response2 = requests.post(OAUTH_URL, headers=headers, json=auth_payload, timeout=LOGIN_TIMEOUT)
     response2.raise_for_status()
 
     if isVerbose:
@@ -55,5 +78,70 @@ def get_auth_token(isVerbose=False):
     if not auth_token:
         print(response2)
         raise ValueError("Failed to retrieve auth token.")
-    
+
     return auth_token
+
+def _fresh(entry):
+    return bool(entry.get("token")) and time.time() < entry.get("expires_at", 0) - REFRESH_MARGIN
+
+def _read_cache_file():
+    if not TOKEN_CACHE_FILE:
+        return {}
+    try:
+        with open(TOKEN_CACHE_FILE, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Ignore tokens cached for a different account
+    return entry if entry.get("uid") == MJS_UID else {}
+
+def _write_cache_file(entry):
+    if not TOKEN_CACHE_FILE:
+        return
+    tmp = f"{TOKEN_CACHE_FILE}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"uid": MJS_UID, **entry}, f)
+    os.replace(tmp, TOKEN_CACHE_FILE)
+
+def get_auth_token(isVerbose=False, force_refresh=False):
+    """
+    Returns a contest gate auth token, logging in only when needed.
+
+    Tokens are memoized in-process and, if MJS_TOKEN_CACHE is set, in that file. A cached
+    token is reused until REFRESH_MARGIN seconds before its TOKEN_TTL runs out.
+    """
+    if not force_refresh and _fresh(_cached):
+        count("auth_token", source="memory")
+        return _cached["token"]
+
+    with _lock:
+        # Another thread may have logged in while this one waited for the lock
+        if not force_refresh:
+            if _fresh(_cached):
+                count("auth_token", source="memory")
+                return _cached["token"]
+            entry = _read_cache_file()
+            if _fresh(entry):
+                count("auth_token", source="file")
+                _cached.update(token=entry["token"], expires_at=entry["expires_at"])
+                return _cached["token"]
+
+        count("auth_token", source="login")
+        token = _login(isVerbose)
+        _cached.update(token=token, expires_at=time.time() + TOKEN_TTL)
+        _write_cache_file(dict(_cached))
+        return token
+
+def invalidate_auth_token(token=None):
+    """
+    Call when the API rejects a token (401) so the next get_auth_token logs in again. With the
+    rejected token given, nothing happens if the cache already holds a newer one.
+    """
+    with _lock:
+        if token is not None and token != _cached["token"]:
+            return
+        _cached.update(token=None, expires_at=0.0)
+        if TOKEN_CACHE_FILE:
+            with suppress(FileNotFoundError):
+                os.remove(TOKEN_CACHE_FILE)
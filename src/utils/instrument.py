@@ -0,0 +1,205 @@
+import atexit
+import cProfile
+import json
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from utils.helpers import get_env
+
+# Timers and counters for the hot paths: scheduler rounds, API calls, token lookups and the
+# export write loop. Everything is a no-op unless MJS_METRICS_FILE is set; then the totals are
+# written there when the process exits, as JSON if the name ends in .json and as Prometheus
+# text otherwise (e.g. metrics.prom), so a GitHub Actions job can upload the file.
+#
+# Timers keep count, sum and max seconds per (name, labels); counters keep a running value.
+# MJS_PROFILE=path additionally runs a script's main under cProfile (see profile_main).
+
+METRICS_FILE = get_env('MJS_METRICS_FILE')
+PROFILE_FILE = get_env('MJS_PROFILE')
+
+# Prepended to every metric name in the Prometheus output
+PREFIX = "mjs_"
+
+enabled = bool(METRICS_FILE)
+
+_lock = threading.Lock()
+_timers = {}  # (name, labels) -> [count, sum, max] in seconds
+_counters = {}  # (name, labels) -> value
+_registered = False
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name, seconds, **labels):
+    # Records one timing
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        entry = _timers.get(key)
+        if entry is None:
+            _timers[key] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+
+def count(name, value=1, **labels):
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+@contextmanager
+def timed(name, **labels):
+    """
+    Times the block as `name` (seconds), e.g. `with timed("round_phase", phase="dp"): ...`.
+    """
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def timer(name, **labels):
+    # Decorator form of timed()
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start, **labels)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    # Current totals as JSON-ready lists
+    with _lock:
+        timers = [{"name": name, "labels": dict(labels), "count": c, "sum": s, "max": m}
+                  for (name, labels), (c, s, m) in sorted(_timers.items())]
+        counters = [{"name": name, "labels": dict(labels), "value": v}
+                    for (name, labels), v in sorted(_counters.items())]
+    return {"timers": timers, "counters": counters}
+
+
+def merge(data):
+    # Adds a snapshot() taken elsewhere (e.g. in a worker process) to the totals here
+    if not enabled:
+        return
+    with _lock:
+        for t in data["timers"]:
+            key = _key(t["name"], t["labels"])
+            entry = _timers.setdefault(key, [0, 0.0, 0.0])
+            entry[0] += t["count"]
+            entry[1] += t["sum"]
+            entry[2] = max(entry[2], t["max"])
+        for c in data["counters"]:
+            key = _key(c["name"], c["labels"])
+            _counters[key] = _counters.get(key, 0) + c["value"]
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def to_prometheus(data=None):
+    """
+    Prometheus text exposition format: each timer is a summary <name>_seconds (count and sum)
+    plus a <name>_seconds_max gauge, each counter a <name>_total counter.
+    """
+    data = data or snapshot()
+    lines = []
+    declared = set()
+
+    def declare(metric, kind):
+        if metric not in declared:
+            declared.add(metric)
+            lines.append(f"# TYPE {metric} {kind}")
+
+    for t in data["timers"]:
+        metric = f"{PREFIX}{t['name']}_seconds"
+        declare(metric, "summary")
+        lines.append(f"{metric}_count{_labels(t['labels'])} {t['count']}")
+        lines.append(f"{metric}_sum{_labels(t['labels'])} {t['sum']:.6f}")
+    for t in data["timers"]:
+        metric = f"{PREFIX}{t['name']}_seconds_max"
+        declare(metric, "gauge")
+        lines.append(f"{metric}{_labels(t['labels'])} {t['max']:.6f}")
+    for c in data["counters"]:
+        metric = f"{PREFIX}{c['name']}_total"
+        declare(metric, "counter")
+        lines.append(f"{metric}{_labels(c['labels'])} {c['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path=None):
+    path = path or METRICS_FILE
+    data = snapshot()
+    text = json.dumps(data, indent=1) if path.endswith(".json") else to_prometheus(data)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _write_at_exit():
+    # Worker processes (scheduler search) must not overwrite the parent's file
+    if METRICS_FILE and multiprocessing.parent_process() is None:
+        write_metrics(METRICS_FILE)
+
+
+def enable(path=None):
+    """
+    Turns collection on from code (benchmarks); with a path, also writes it at exit.
+    """
+    global enabled, METRICS_FILE, _registered
+    enabled = True
+    if path:
+        METRICS_FILE = path
+    if METRICS_FILE and not _registered:
+        atexit.register(_write_at_exit)
+        _registered = True
+
+
+if enabled:
+    enable()
+
+
+def profile_main(main, *args, **kwargs):
+    """
+    Calls main(*args, **kwargs). With MJS_PROFILE set, runs it under cProfile and dumps the stats
+    to that file (read with `python -m pstats FILE`).
+    """
+    if not PROFILE_FILE:
+        return main(*args, **kwargs)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(main, *args, **kwargs)
+    finally:
+        profiler.dump_stats(PROFILE_FILE)
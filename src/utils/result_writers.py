@@ -0,0 +1,182 @@
+import csv
+import json
+import os
+import shutil
+from abc import ABC, abstractmethod
+
+# Output formats for exported game records. Every writer produces its file the same way:
+#   begin() -> write_rows(...) / copy_existing() in file order -> commit()
+# Rows go to a temp file that commit() renames over the target, so readers never see a
+# half-written export. copy_existing() streams the previous file's rows in, which is how
+# incremental exports add new games without refetching old ones.
+
+# Define CSV column headers
+WIDE_COLUMNS = [
+    "start_time", "end_time", "tag",
+    "player1_nickname", "player1_part_point", "player1_total_point",
+    "player2_nickname", "player2_part_point", "player2_total_point",
+    "player3_nickname", "player3_part_point", "player3_total_point",
+    "player4_nickname", "player4_part_point", "player4_total_point"
+]
+
+# One row per seat per game
+LONG_COLUMNS = ["start_time", "end_time", "tag", "seat", "nickname", "part_point", "total_point"]
+
+POINT_COLUMNS = {c for c in WIDE_COLUMNS + LONG_COLUMNS if c.endswith("_point")}
+
+
+def _point(value, typed):
+    # Raw API value, or an int (None when missing) for typed output
+    if not typed:
+        return value
+    return None if value in ("", None) else int(value)
+
+
+def seat_results(game, typed=False):
+    # (nickname, part_point, total_point) for seats 0 through 3
+    player_data = {p['seat']: p for p in game['result']['players']}
+    nickname_data = {a['seat']: a['nickname'] for a in game['accounts']}
+
+    seats = []
+    for seat in range(4):
+        nickname = nickname_data.get(seat, "")
+        if not nickname:
+            nickname = "computer"
+        part_point = player_data.get(seat, {}).get('part_point_1', "")
+        total_point = player_data.get(seat, {}).get('total_point', "")
+        seats.append((nickname, _point(part_point, typed), _point(total_point, typed)))
+    return seats
+
+
+def wide_rows(game, typed=False):
+    row = [game['start_time'], game['end_time'], game['tag']]
+    for seat in seat_results(game, typed):
+        row.extend(seat)
+    return [row]
+
+
+def long_rows(game, typed=False):
+    head = [game['start_time'], game['end_time'], game['tag']]
+    return [head + [seat, *result] for seat, result in enumerate(seat_results(game, typed))]
+
+
+LAYOUTS = {
+    "wide": (WIDE_COLUMNS, wide_rows),
+    "long": (LONG_COLUMNS, long_rows),
+}
+
+
+class ResultWriter(ABC):
+    extension = None
+    # Whether rows must be typed (columnar formats need one type per column)
+    typed_only = False
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.tmp = f"{path}.tmp"
+
+    @abstractmethod
+    def begin(self):
+        """Opens the temp file (and writes any header)."""
+
+    @abstractmethod
+    def write_rows(self, rows):
+        """Appends rows (sequences in self.columns order)."""
+
+    @abstractmethod
+    def copy_existing(self):
+        """Appends the rows of the current file at self.path."""
+
+    @abstractmethod
+    def close(self):
+        """Finishes and closes the temp file."""
+
+    def commit(self):
+        self.close()
+        os.replace(self.tmp, self.path)
+
+
+class CsvWriter(ResultWriter):
+    extension = "csv"
+
+    def begin(self):
+        self.file = open(self.tmp, mode='w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.columns)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def copy_existing(self):
+        with open(self.path, mode='r', newline='', encoding='utf-8-sig') as old:
+            old.readline()  # header
+            shutil.copyfileobj(old, self.file)
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlWriter(ResultWriter):
+    extension = "jsonl"
+
+    def begin(self):
+        self.file = open(self.tmp, mode='w', encoding='utf-8')
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False))
+            self.file.write("\n")
+
+    def copy_existing(self):
+        with open(self.path, mode='r', encoding='utf-8') as old:
+            shutil.copyfileobj(old, self.file)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter(ResultWriter):
+    extension = "parquet"
+    typed_only = True
+    batch_size = 10000
+
+    def begin(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output needs pyarrow (pip install -r requirements-dev.txt).") from e
+
+        self.pa, self.pq = pa, pq
+        self.schema = pa.schema([
+            (c, pa.int64() if c in POINT_COLUMNS or c in ("start_time", "end_time", "seat") else pa.string())
+            for c in self.columns
+        ])
+        self.writer = pq.ParquetWriter(self.tmp, self.schema)
+        self.batch = []
+
+    def _flush(self):
+        if self.batch:
+            columns = list(zip(*self.batch))
+            self.writer.write_table(self.pa.table(
+                [self.pa.array(col, type=field.type) for col, field in zip(columns, self.schema)],
+                schema=self.schema,
+            ))
+            self.batch = []
+
+    def write_rows(self, rows):
+        self.batch.extend(rows)
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def copy_existing(self):
+        self._flush()
+        self.writer.write_table(self.pq.read_table(self.path, schema=self.schema))
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+WRITERS = {cls.extension: cls for cls in (CsvWriter, JsonlWriter, ParquetWriter)}
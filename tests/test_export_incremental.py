@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+sys.path.insert(0, os.path.join(HERE, "..", "benchmarks"))
+
+from mock_contest_api import CONTEST_PREFIX, TOKEN, MockContestServer
+from utils import api
+import export_results_csv
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = MockContestServer(records=50).start()
+    monkeypatch.setattr(api, "_client", api.MjsClient(token=TOKEN, api_root=f"{server.base_url}{CONTEST_PREFIX}"))
+    yield server
+    server.stop()
+
+
+def export(out_dir, monkeypatch, **kwargs):
+    monkeypatch.setenv("CSV_OUTPUT_DIR", str(out_dir))
+    export_results_csv.export_results_csv(**kwargs)
+    with open(out_dir / "results_season_1.csv", "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("newest_first", [False, True])
+def test_incremental_matches_full(server, tmp_path, monkeypatch, newest_first):
+    # Mock games end 30-50 minutes after they start, 10 minutes apart, so they do not finish
+    # in the order they are listed
+    server.state.newest_first = newest_first
+    export(tmp_path / "incremental", monkeypatch)
+    for _ in range(29):
+        server.state.records += 1
+        incremental = export(tmp_path / "incremental", monkeypatch)
+
+    full = export(tmp_path / "full", monkeypatch, full=True)
+    assert len(full.splitlines()) == 80
+    assert incremental == full
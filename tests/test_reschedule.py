@@ -0,0 +1,35 @@
+import os
+import sys
+from collections import Counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from league_scheduling import main
+from schedule_11_players import WeekScheduler
+from scheduling.schedule_io import read_schedule_csv, write_schedule_csv
+
+
+def test_reschedule_keeps_one_game_rounds(tmp_path):
+    # 11 teams, 11 games a week (one per match_id), 4 games per team per week, like schedule.csv
+    schedule, weeks = WeekScheduler(num_players=11, games_per_week=11, weeks=6, seed=1).create_schedule()
+    original = tmp_path / "schedule.csv"
+    output = tmp_path / "rescheduled.csv"
+    write_schedule_csv(schedule, weeks, str(original))
+
+    main(["--players", "11", "--output", str(output), "reschedule", "--input", str(original),
+          "--played", "30", "--drop", "4", "--add", "12"])
+    rescheduled, new_weeks = read_schedule_csv(str(output))
+
+    assert rescheduled[:30] == schedule[:30]
+    assert new_weeks == weeks
+    assert all(len(round_games) == 1 for round_games in rescheduled)
+
+    games = Counter(p for round_games in rescheduled for game in round_games for p in game)
+    assert set(games) == set(range(1, 13))
+    assert max(games[p] for p in range(1, 12) if p != 4) <= 24
+
+    per_week = Counter((week, p) for week, round_games in zip(new_weeks, rescheduled)
+                       for game in round_games for p in game)
+    assert max(per_week.values()) <= 4
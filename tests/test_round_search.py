@@ -0,0 +1,42 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from scheduling.round_dp import best_partition
+from scheduling.round_search import bnb_partition, cpsat_partition, group_cost
+
+
+def random_costs(n, seed):
+    # Pair counts like those seen mid-season: small non-negative integers
+    upper = np.triu(np.random.default_rng(seed).integers(0, 6, size=(n, n)), 1)
+    return upper + upper.T
+
+
+def total(cost, grouping):
+    return sum(group_cost(cost, group) for group in grouping)
+
+
+def check_partition(grouping, n):
+    assert all(len(group) == 4 for group in grouping)
+    assert sorted(p for group in grouping for p in group) == list(range(n))
+
+
+@pytest.mark.parametrize("n", [8, 12, 16])
+def test_bnb_matches_dp(n):
+    cost = random_costs(n, n)
+    grouping = bnb_partition(cost)
+    check_partition(grouping, n)
+    assert total(cost, grouping) == total(cost, best_partition(cost))
+
+
+@pytest.mark.parametrize("n", [8, 12, 16])
+def test_cpsat_matches_dp(n):
+    pytest.importorskip("ortools")
+    cost = random_costs(n, n)
+    grouping = cpsat_partition(cost)
+    check_partition(grouping, n)
+    assert total(cost, grouping) == total(cost, best_partition(cost))